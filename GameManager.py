@@ -1,152 +1,177 @@
+import argparse
 import pygame
 import logging
-import time  # Импортируем модуль time
-import re
-from game.Board import Board
-from game.Player import Player
+from game.Batch import run_batch
+from game.CommandServer import run_server
+from game.Commands import CommandStream, parse_command, GamerCommand, PutBotCommand, MoveCommand, EndCommand
+from game.Game import Game
+from game.Logs import EventLog, setup_logging
+from game.PlanWorker import PlanWorker
+from game.Renderer import Renderer
+from game.TurnScheduler import TurnScheduler, PLACING
 from game.config import GameConfig
-from game.PlayerSimulator import PlayerSimulator
 from game.consts import DEFAULT_IMAGE_SIZE
-from game.AutoPlay import AutoPlay
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(asctime)s - %(message)s')
+pygame.init()
 
-file_handler = logging.FileHandler('game.log')
-file_handler.setLevel(logging.INFO)
-file_handler.setFormatter(logging.Formatter('%(asctime)s - %(asctime)s - %(message)s'))
+FPS = 60
+PLACE_DELAY_MS = 80  # Пауза между расстановками роботов автоботом (кроме турбо-режима)
+COMMAND_POLL_MS = 10  # Как часто режим 2 проверяет, не дописан ли файл команд
+PLAN_READY = pygame.USEREVENT  # Ход автобота посчитан в фоне: будит главный цикл
 
-logging.getLogger().addHandler(file_handler)
+KEY_NAMES = {
+    pygame.K_TAB: 'tab',
+    pygame.K_1: '1',
+    pygame.K_2: '2',
+    pygame.K_3: '3',
+    pygame.K_4: '4',
+    pygame.K_UP: 'up',
+    pygame.K_DOWN: 'down',
+    pygame.K_LEFT: 'left',
+    pygame.K_RIGHT: 'right'
+}
 
-pygame.init()
+
+def end_game():
+    logging.info("Player has ended the game")
 
 
 class GameManager:
-    def __init__(self):
-        self.config = GameConfig("game.config")
+    def __init__(self, config=None, lookahead_ms=None):
+        self.config = config if config is not None else GameConfig("game.config")
         self.screen = pygame.display.set_mode((DEFAULT_IMAGE_SIZE[0] * 15, DEFAULT_IMAGE_SIZE[1] * 11))
         pygame.display.set_caption('Robotics Board Game')
-        self.board = Board("csv_files/colors.csv", "csv_files/targets.csv")
-        self.players = [
-            Player(color=color, num_robots=self.config.robots_per_player, idx=idx,
-                   move_limit_per_turn=self.config.move_limit_per_turn, game_manager=self)
-            for color, idx in [('blue', 0), ('red', 1), ('green', 2), ('orange', 3)][:self.config.get_num_players()]
-        ]
-        self.simulator = PlayerSimulator(self.players, self.board, self.screen, self)
-        self.auto_play = [AutoPlay(player, self.board) for player_type, player in
-                          zip(self.config.players_info[1:], self.players) if player_type == 1]
+        self.game = Game(self.config, lookahead_ms=lookahead_ms)
+        self.board = self.game.board
+        self.players = self.game.players
+        self.simulator = self.game.simulator
+        self.auto_play = self.game.auto_play
+        self.renderer = Renderer(self.screen, self.board, self.players, turbo=bool(self.config.turbo))
+        self.simulator.renderer = self.renderer
+        self.worker = PlanWorker(self.game, on_ready=self.plan_ready)  # Автоботы думают не в потоке окна
+        self.scheduler = TurnScheduler(self.game, self.worker)
+        self.initial_state = self.game.snapshot()  # Для сброса без пересоздания доски, окна и картинок
+        self.last_frame = 0
         self.running = False
         self.placing_phase = self.simulator.placing_phase
         self.game_reset = False  # Флаг сброса игры
 
     def reset_game(self):
-        """Сброс: Перезапуск игры"""
+        """Сброс: Перезапуск игры. Состояние возвращается к снимку начала партии, посылки разыгрываются заново"""
         logging.info("Resetting the game.")
-
-        # Останавливаем все автоплеи перед сбросом игры
-        for autoplay in self.auto_play:
-            autoplay.reset_autoplay()
-
-        self.game_reset = True  # Устанавливаем флаг сброса игры
-        self.running = False  # Убеждаемся, что текущий игровой цикл завершен
-
-        # Перезапуск игры
-        self.__init__()
+        self.game.restore(self.initial_state, rng=False)
+        self.simulator.place_initial_packages()
+        self.scheduler = TurnScheduler(self.game, self.worker)
         self.running = True
         self.placing_phase = True
         self.simulator.update_package_visibility(self.placing_phase)
 
-    def handle_events(self):
+    def handle_events(self, events=None):
         """Обработка ввода игрока"""
-        for event in pygame.event.get():
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 self.running = False
                 logging.info("Game terminated by user.")
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.renderer.invalidate()
             elif event.type == pygame.MOUSEBUTTONDOWN and self.placing_phase:
+                if self.game.get_auto_play(self.game.current_player):
+                    continue
                 cell_x = (event.pos[0] // DEFAULT_IMAGE_SIZE[0]) - 1
                 cell_y = (event.pos[1] // DEFAULT_IMAGE_SIZE[1]) - 1
                 success = self.simulator.place_robot_at_position(cell_x, cell_y)
                 if success:
                     self.placing_phase = not success
                     self.simulator.update_package_visibility(self.placing_phase)
-            elif event.type == pygame.KEYDOWN and not self.placing_phase:
-                current_player = self.players[self.simulator.current_player]
-                if current_player not in [auto_play.player for auto_play in self.auto_play]:
-                    self.simulator.PressedKey(event)
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_t:
+                self.renderer.animator.turbo = not self.renderer.animator.turbo
+                logging.info(f"Turbo mode {'on' if self.renderer.animator.turbo else 'off'}.")
+            elif event.type == pygame.KEYDOWN and not self.placing_phase and event.key in KEY_NAMES:
+                if not self.game.get_auto_play(self.game.current_player):
+                    self.simulator.PressedKey(KEY_NAMES[event.key])
+
+    def plan_ready(self):
+        """Из потока планирования: событие будит главный цикл, который спит в wait_events"""
+        if pygame.get_init():
+            pygame.event.post(pygame.event.Event(PLAN_READY))
+
+    @property
+    def turbo(self):
+        return self.renderer.animator.turbo
+
+    def wait_events(self, timeout):
+        """Ожидание ввода: timeout 0 - только забрать накопившиеся события, None - спать до события,
+        иначе спать не дольше timeout мс"""
+        if timeout == 0:
+            return pygame.event.get()
+        first = pygame.event.wait() if timeout is None else pygame.event.wait(max(1, timeout))
+        return [first] + pygame.event.get()
+
+    def frame_timeout(self, timeout):
+        """Если экран ещё не дорисован, просыпаемся не позже следующего кадра"""
+        if not self.renderer.dirty:
+            return timeout
+        return 1000 // FPS if timeout is None else min(timeout, 1000 // FPS)
+
+    def next_frame(self):
+        """Кадр: анимации и отрисовка изменившихся областей, если что-то изменилось.
+        В турбо-режиме кадры чаще FPS пропускаются"""
+        if not self.turbo:
+            self.simulator.ScreenAnimator()
+        elif pygame.time.get_ticks() - self.last_frame >= 1000 // FPS:
+            self.last_frame = pygame.time.get_ticks()
+            self.simulator.ScreenAnimator()
+
+    def action_delay(self, last_action):
+        """Через сколько мс можно выполнить действие автобота: 0 - сейчас, None - ждём ввода или анимацию"""
+        if not self.scheduler.is_automatic():
+            return None
+        if not self.scheduler.ready():
+            return None  # План считается в фоне, цикл разбудит PLAN_READY
+        if self.turbo:
+            return 0
+        if self.scheduler.phase == PLACING:
+            return max(0, PLACE_DELAY_MS - (pygame.time.get_ticks() - last_action))
+        # Следующий ход автобота - когда доиграла анимация предыдущего
+        return None if self.renderer.animator.busy else 0
 
     def run_game_mode_1(self):
-        """Режим игры 1: Запуск первого режима игры, тут могут быть роботы-автоботы"""
+        """Режим игры 1: Запуск первого режима игры, тут могут быть роботы-автоботы.
+        Цикл событийный: действия берутся из очереди планировщика, а без дела цикл спит до ввода или таймера"""
         self.running = True
         self.placing_phase = True
         logging.info("run_game_mode_1 started")
         self.simulator.update_package_visibility(self.placing_phase)
+        last_action = -PLACE_DELAY_MS
 
         while self.running:
             if self.game_reset:
                 break  # Прерываем выполнение, если игра была сброшена
 
-            while self.placing_phase and self.running:
-                if self.game_reset:
-                    break  # Прерываем выполнение, если игра была сброшена
-
-                self.screen.fill((255, 255, 255))  # Очистить экран
-                current_player = self.players[self.simulator.current_player]
-
-                if current_player in [auto_play.player for auto_play in self.auto_play]:
-                    autoplay = next(auto_play for auto_play in self.auto_play if auto_play.player == current_player)
-                    random_pos = autoplay.get_random_white_cell_position()
-                    if random_pos:
-                        time.sleep(0.08)
-                        success = self.simulator.place_robot_at_position(random_pos[0], random_pos[1])
-                        if success:
-                            pass  # Добавим задержку в одну секунду после установки робота
-                    else:
-                        logging.error("No white cells available to place robot.")
-                else:
-                    self.handle_events()
-                self.simulator.ScreenAnimator()
-                pygame.display.flip()  # Обновить экран
-
-            # Основной игровой цикл
-            while not self.placing_phase and self.running:
-                if self.game_reset:
-                    break  # Прерываем выполнение, если игра была сброшена
-
-                current_player_idx = self.simulator.current_player
-                current_player = self.players[current_player_idx]
-
-                if current_player in [auto_play.player for auto_play in self.auto_play]:
-                    autoplay = next(auto_play for auto_play in self.auto_play if auto_play.player == current_player)
-                    if autoplay.play():
-                        self.simulator.switch_to_next_player()
-                else:
-                    self.handle_events()
-                    self.simulator.ScreenAnimator()
-                    pygame.display.flip()  # Обновление экрана
-                    pygame.time.wait(100)  # Ждать, чтобы не перегружать CPU
-
+            if self.action_delay(last_action) == 0:
+                if not self.scheduler.step():
+                    self.running = False
+                    break
+                last_action = pygame.time.get_ticks()
+                self.placing_phase = self.simulator.placing_phase
+                if self.game.winner:
+                    self.reset_game()
+                    continue
+
+            # Срок ожидания считаем после кадра: на нём могла доиграть анимация
+            self.next_frame()
+            self.handle_events(self.wait_events(self.frame_timeout(self.action_delay(last_action))))
+            self.scheduler.sync()
+            if self.game.winner:
+                self.reset_game()
+
+        self.worker.close()
         pygame.quit()
 
     def run_game_mode_2(self):
-        """Режим игры 2: ввод из commands txt, примеры комманд там же, здесь только ручной ввод, его можно не трогать"""
-
-        def is_valid_command(command):
-            gamer_command = r"^GAMER \d+$"
-            put_bot_command = r"^PUT BOT [a-g][1-8]$"
-            move_command = r"^MOVE ([a-g][1-8]-)+[a-g][1-8]$"
-            end_command = r"^END$"
-
-            if re.match(gamer_command, command):
-                return True
-            elif re.match(put_bot_command, command):
-                return True
-            elif re.match(move_command, command):
-                return True
-            elif re.match(end_command, command):
-                return True
-            else:
-                return False
-
-        cnt = 0
+        """Режим игры 2: ввод из commands txt, примеры комманд там же, здесь только ручной ввод, его можно не трогать.
+        Файл читается потоково: новые строки подхватываются за COMMAND_POLL_MS и применяются пачкой"""
+        stream = CommandStream("commands.txt")
         self.running = True
         logging.info("run_game_mode_2 started")
 
@@ -154,25 +179,19 @@ class GameManager:
             if self.game_reset:
                 break  # Прерываем выполнение, если игра была сброшена
 
-            for event in pygame.event.get():
+            for command in stream.poll():
+                self.execute_command(command)
+                if not self.running:
+                    break
+
+            self.next_frame()
+            for event in self.wait_events(self.frame_timeout(COMMAND_POLL_MS)):
                 if event.type == pygame.QUIT:
                     self.running = False
                     logging.info("Game terminated by user.")
                     break
-
-            with open("commands.txt", "r") as file:
-                commands = file.readlines()
-
-                for command in commands[cnt:]:
-                    command = command.strip()
-                    if is_valid_command(command):
-                        self.execute_command(command)
-                        cnt += 1
-                    else:
-                        if command != '':
-                            logging.warning(f"Invalid command: {command}")
-
-            time.sleep(1)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.renderer.invalidate()
 
         pygame.quit()
 
@@ -182,23 +201,27 @@ class GameManager:
         return commands
 
     def execute_command(self, command):
-        parts = command.strip().split()
-        if not parts:
-            return
+        if isinstance(command, str):
+            command = parse_command(command)
+            if command is None:
+                return
 
-        if self.placing_phase and not (parts[0] == "PUT" and parts[1] == "BOT") and parts[0] != "GAMER":
+        if self.placing_phase and not isinstance(command, (PutBotCommand, GamerCommand)):
             self.placing_phase = False
             logging.info(f"Placing phase ended.")
             self.simulator.update_package_visibility(self.placing_phase)
 
-        if parts[0] == "GAMER":
-            self.simulator.current_player = int(parts[1]) - 1
+        if isinstance(command, GamerCommand):
+            if not 0 <= command.player < len(self.players):
+                logging.warning(f"No player {command.player + 1} in this game.")
+                return
+            self.simulator.current_player = command.player
             logging.info(f"Switched to Player {self.simulator.current_player + 1}.")
-        elif parts[0] == "PUT" and parts[1] == "BOT":
-            self.simulator.execute_put_bot(self.simulator.current_player, parts[2])
-        elif parts[0] == "MOVE":
-            self.simulator.StartTurn(self.simulator.current_player, parts[1])
-        elif parts[0] == "END":
+        elif isinstance(command, PutBotCommand):
+            self.simulator.execute_put_bot(self.simulator.current_player, command.pos)
+        elif isinstance(command, MoveCommand):
+            self.simulator.StartTurn(self.simulator.current_player, command.path)
+        elif isinstance(command, EndCommand):
             end_game()
             self.running = False
 
@@ -210,9 +233,19 @@ class GameManager:
 
 
 if __name__ == "__main__":
-    game_manager = GameManager()
-    game_manager.run()
-
-
-def end_game():
-    logging.info("Player has ended the game")
+    parser = argparse.ArgumentParser(description="Игра; режим выбирается первой строкой game.config")
+    parser.add_argument("--events", default=None, help="журнал событий партии в JSON lines, по умолчанию выключен")
+    parser.add_argument("--lookahead-ms", type=float, default=None, help="автоботы ищут ход с просмотром вперёд, "
+                                                                         "мс на ход")
+    args = parser.parse_args()
+    setup_logging('game.log', events=args.events)
+    config = GameConfig("game.config")
+    if config.game_mode == 3:
+        run_batch(config)  # Режим 3: пакетный прогон без окна
+    elif config.game_mode == 4:
+        run_server(config)  # Режим 4: сервер команд для внешних ботов
+    else:
+        game_manager = GameManager(config, args.lookahead_ms)
+        if args.events:
+            EventLog(game_manager.game)
+        game_manager.run()
@@ -0,0 +1,54 @@
+from collections import deque
+from game.consts import DEFAULT_IMAGE_SIZE
+
+
+class Animator:
+    """Планировщик анимаций: спрайты роботов едут к новым клеткам по часам кадров и не блокируют игру.
+    В турбо-режиме промежуточные кадры пропускаются, спрайт сразу встаёт на место"""
+
+    def __init__(self, renderer, step_duration=80, turbo=False):
+        self.renderer = renderer
+        self.step_duration = step_duration  # мс на одну клетку
+        self.turbo = turbo
+        self.queues = {}  # Робот -> очередь точек назначения в пикселях
+        self.active = {}  # Робот -> (откуда, куда, время начала)
+
+    @property
+    def busy(self):
+        return bool(self.active or self.queues)
+
+    def add_move(self, robot, pos):
+        target = ((pos[0] + 1) * DEFAULT_IMAGE_SIZE[0], (pos[1] + 1) * DEFAULT_IMAGE_SIZE[1])
+        if self.turbo:
+            self.active.pop(robot, None)
+            self.queues.pop(robot, None)
+            self.set_sprite(robot, target)
+        else:
+            self.queues.setdefault(robot, deque()).append(target)
+
+    def set_sprite(self, robot, xy):
+        rect = self.renderer.robot_rect(robot)
+        self.renderer.invalidate(self.renderer.robot_bounds(robot))
+        rect.x, rect.y = xy
+        self.renderer.invalidate(self.renderer.robot_bounds(robot))
+
+    def update(self, now):
+        """Сдвиг всех спрайтов к моменту now (мс)"""
+        for robot in list(self.queues):
+            if robot not in self.active:
+                rect = self.renderer.robot_rect(robot)
+                self.active[robot] = ((rect.x, rect.y), self.queues[robot].popleft(), now)
+                if not self.queues[robot]:
+                    del self.queues[robot]
+
+        for robot, (start, end, started) in list(self.active.items()):
+            progress = min(1.0, (now - started) / self.step_duration)
+            self.set_sprite(robot, (start[0] + (end[0] - start[0]) * progress,
+                                    start[1] + (end[1] - start[1]) * progress))
+            if progress >= 1.0:
+                del self.active[robot]
+                # Следующий отрезок начинается сразу, без лишнего кадра на месте
+                if robot in self.queues:
+                    self.active[robot] = (end, self.queues[robot].popleft(), now)
+                    if not self.queues[robot]:
+                        del self.queues[robot]
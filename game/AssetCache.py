@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import pygame
+
+
+class AssetCache:
+    """Кэш картинок, шрифтов и отрисованных надписей: каждая картинка грузится с диска один раз,
+    масштабированные варианты и надписи хранятся с вытеснением давно не использованных (LRU)"""
+
+    def __init__(self, max_scaled=64, max_glyphs=512):
+        self.images = {}
+        self.fonts = {}
+        self.scaled_images = OrderedDict()
+        self.glyphs = OrderedDict()
+        self.max_scaled = max_scaled
+        self.max_glyphs = max_glyphs
+
+    @staticmethod
+    def lru_get(cache, key):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    @staticmethod
+    def lru_put(cache, key, value, limit):
+        cache[key] = value
+        if len(cache) > limit:
+            cache.popitem(last=False)
+        return value
+
+    def image(self, path):
+        image = self.images.get(path)
+        if image is None:
+            image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()  # Формат экрана: blit без преобразования на каждом кадре
+            self.images[path] = image
+        return image
+
+    def scaled(self, path, size):
+        size = (int(size[0]), int(size[1]))
+        key = (path, size)
+        image = self.lru_get(self.scaled_images, key)
+        if image is None:
+            image = self.lru_put(self.scaled_images, key, pygame.transform.scale(self.image(path), size),
+                                 self.max_scaled)
+        return image
+
+    def font(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.SysFont(name, size)
+        return font
+
+    def glyph(self, text, size, color=(0, 0, 0), name=None):
+        """Отрисованная надпись text шрифтом (name, size)"""
+        key = (name, size, text, color)
+        img = self.lru_get(self.glyphs, key)
+        if img is None:
+            img = self.lru_put(self.glyphs, key, self.font(size, name).render(text, True, color), self.max_glyphs)
+        return img
+
+
+assets = AssetCache()  # Общий кэш для всех отрисовщиков
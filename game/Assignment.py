@@ -0,0 +1,124 @@
+UNREACHABLE = 10 ** 6  # Стоимость пары робот-посылка, если до посылки не дойти
+
+
+def hungarian(costs):
+    """Венгерский алгоритм для прямоугольной матрицы стоимостей: список пар (строка, столбец) с минимальной суммой"""
+    if not costs or not costs[0]:
+        return []
+    n, m = len(costs), len(costs[0])
+    if n > m:
+        return [(i, j) for j, i in hungarian([list(column) for column in zip(*costs)])]
+
+    infinity = float('inf')
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)  # p[j] - строка, назначенная столбцу j (с единицы, 0 - никому)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [infinity] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = infinity
+            j1 = 0
+            row = costs[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+
+def pickup_cell(package):
+    """Клетка подбора: зелёная клетка над красной клеткой с посылкой"""
+    return package.pos[0], package.pos[1] - 1
+
+
+def pickup_costs(board, robot, packages):
+    """Расстояния от робота до клеток подбора всех посылок по одному полю расстояний от самого робота:
+    сетка неориентированная, путь туда и обратно одной длины. Один BFS на робота вместо BFS на каждую посылку"""
+    field = board.distance_field(robot.pos)
+    size = board.size
+    costs = []
+    for package in packages:
+        x, y = pickup_cell(package)
+        distance = field[y * size + x] if 0 <= x < size and 0 <= y < size else -1
+        costs.append(UNREACHABLE if distance < 0 else distance)
+    return costs
+
+
+def allocate_packages(robots, packages, board):
+    """Распознание посылок: оптимальное распределение по сумме настоящих расстояний до клеток подбора"""
+    costs = [pickup_costs(board, robot, packages) for robot in robots]
+    return {robots[i]: packages[j] for i, j in hungarian(costs) if costs[i][j] < UNREACHABLE}
+
+
+class PackageAssigner:
+    """Распределение посылок между пустыми роботами игрока по настоящим расстояниям.
+    Пересчитывается только когда посылку подобрали, сдали или появилась новая"""
+
+    def __init__(self, player, board):
+        self.player = player
+        self.board = board
+        self.assignments = {}
+        self.dirty = True
+        board.add_observer(self)
+
+    def on_robot_placed(self, robot):
+        self.dirty = True
+
+    def on_package_placed(self, package):
+        self.dirty = True
+
+    def on_package_picked(self, robot, package):
+        self.dirty = True
+
+    def on_package_dropped(self, robot, package):
+        self.dirty = True
+
+    def on_state_restored(self):
+        self.dirty = True
+
+    def available_packages(self):
+        return list(self.board.available_packages.values())
+
+    def solve(self):
+        robots = [robot for robot in self.player.robots if not robot.has_package]
+        self.assignments = allocate_packages(robots, self.available_packages(), self.board)
+        self.dirty = False
+
+    def goal(self, robot):
+        """Клетка подбора назначенной роботу посылки; без назначения - ближайшая достижимая"""
+        if self.dirty:
+            self.solve()
+        package = self.assignments.get(robot)
+        if package is None or package.picked_up:
+            packages = self.available_packages()
+            if not packages:
+                return None
+            costs = pickup_costs(self.board, robot, packages)
+            cost, package = min(zip(costs, packages), key=lambda pair: pair[0])
+            if cost >= UNREACHABLE:
+                return None
+        return pickup_cell(package)
@@ -1,36 +1,20 @@
 import logging
-import random
 import time  # импортируем модуль time для добавления задержки
-from collections import deque
+from game.Assignment import PackageAssigner
+from game.Planner import CooperativePlanner
 
-
-def allocate_packages(robots, packages):
-    """Распознание посылок"""
-    assignments = {}
-    remaining_packages = packages[:]
-
-    for robot in robots:
-        closest_package = None
-        closest_distance = float('inf')
-
-        for package in remaining_packages:
-            distance = abs(robot.pos[0] - package.pos[0]) + abs(robot.pos[1] - package.pos[1])
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_package = package
-
-        if closest_package:
-            assignments[robot] = closest_package
-            remaining_packages.remove(closest_package)
-
-    return assignments
+MAX_PLAN_ROUNDS = 3  # Сколько раз за ход допланируем роботов, у которых сменилась цель (например, подобрали посылку)
 
 
 class AutoPlay:
-    def __init__(self, player, board):
+    def __init__(self, player, board, cooperative=True, planner=None, search=None):
         self.player = player
         self.board = board
         self.active = True  # Флаг, чтобы контролировать, активен ли autoplay
+        self.cooperative = cooperative  # False - старый пошаговый режим, каждый робот сам по себе
+        self.planner = planner if planner is not None else CooperativePlanner(board)
+        self.assigner = PackageAssigner(player, board)
+        self.search = search  # LookaheadSearch: ход ищется с просмотром вперёд в пределах бюджета времени
 
     def reset_autoplay(self):
         """Сброс состояния автоплея, это мои попытки наладить  игру, они не сработали"""
@@ -40,12 +24,12 @@ class AutoPlay:
 
 
     def find_white_cells(self):
-        return self.board.get_cells_by_color('w')
+        return self.board.white_cells
 
     def get_random_white_cell_position(self):
-        white_cells = self.find_white_cells()
+        white_cells = [cell for cell in self.find_white_cells() if not self.board.is_occupied((cell.x, cell.y))]
         if white_cells:
-            cell = random.choice(white_cells)
+            cell = self.board.random.choice(white_cells)
             return cell.x, cell.y
         return None
 
@@ -65,88 +49,152 @@ class AutoPlay:
     #     return target_package, target_pos
 
     def find_target_cell(self, package):
-        for row in self.board.cells:
-            for cell in row:
-                if cell.target == package.number:
-                    return cell
+        return self.board.target_cell(package.number)
 
     def is_valid_move(self, robot, new_pos):
-        x, y = new_pos
-        if 0 <= x < self.board.size and 0 <= y < self.board.size:
-            target_cell = self.board.cells[y][x]
-            # Проверяем, занята ли клетка другим роботом
-            if self.board.is_occupied(new_pos):
-                logging.debug(f"Cell at {new_pos} is occupied by another robot.")
-                return False
-            # Проверяем, является ли клетка целевой
-            if target_cell.target:
-                if robot.package and target_cell.target == robot.package.number:
-                    logging.debug(f"Cell at {new_pos} is robot's own target cell.")
-                    pass  # Разрешаем движение
-                else:
-                    logging.debug(f"Cell at {new_pos} is a target cell for another package. Move not allowed.")
-                    return False  # Запрещаем движение на чужие целевые клетки
-            # Проверяем цвет клетки
-            if target_cell.color in ('w', 'a', 'g', 'y'):
-                logging.debug(f"Cell at {new_pos} is valid for movement.")
-                return True
-            else:
-                logging.debug(f"Cell at {new_pos} has invalid color '{target_cell.color}'.")
-                return False
-        logging.debug(f"Cell at {new_pos} is out of bounds.")
-        return False
+        return self.board.is_valid_move(robot, new_pos)
 
     def move_robot_towards(self, robot, target_pos):
-        path = self.find_path(robot, target_pos)
-        if path:
-            # Получаем первый шаг
-            direction, new_pos = path[0]
-            if robot.move(direction, self.board):
-                # Проверяем, достиг ли робот целевой клетки для сдачи посылки
-                target_cell = self.board.cells[new_pos[1]][new_pos[0]]
-                if target_cell.target and robot.package and target_cell.target == robot.package.number:
-                    # Робот доставил посылку, и его ход должен завершиться
-                    robot.drop_package(target_cell)
-                    logging.info(f"Robot {robot.index} delivered package at {new_pos}. Movement ends.")
-                    return None  # Ход завершён после сдачи посылки
-
-                if not robot.has_package:
-                    if target_cell.color == 'a':  # Проверяем, есть ли посылка под роботом
-                        below_cell = self.board[new_pos[1] + 1][new_pos[0]]
-                        if below_cell.color == 'r' and below_cell.package and not below_cell.package.picked_up:
-                            robot.pick_package(below_cell.package, self.board)
-                            logging.info(f"Robot {robot.index} picked up package from {below_cell.pos}")
-
-                # Возвращаем новую позицию, если робот не сдавал посылку
-                return new_pos
+        step = self.board.next_step(robot, target_pos)
+        if step is None and self.board.distance(robot.pos, target_pos) is not None:
+            # Кратчайшие шаги заняты роботами: ищем обход с учётом занятых клеток
+            path = self.find_path(robot, target_pos)
+            step = path[0] if path else None
+        if step:
+            return self.make_step(robot, step)
 
         logging.warning(f"No path found for robot at {robot.pos} to target {target_pos}")
         return None
 
-    def play(self):
+    def deliver_step(self, robot):
+        """Шаг робота с посылкой: спуск по полю расстояний до цели с номером посылки.
+        Только для пошагового режима (cooperative=False): в кооперативном груженых роботов ведёт планировщик
+        по статичному полю расстояний, а поле потока с роботами-стенами там ведёт в обход уходящих роботов
+        и удлиняет партии"""
+        step = self.board.flow_step(robot)
+        if step:
+            return self.make_step(robot, step)
+
+        logging.warning(f"No path found for robot at {robot.pos} to target {robot.package.number}")
+        return None
+
+    def make_step(self, robot, step):
+        """Выполнение шага; None, если робот сдал посылку или не смог сдвинуться"""
+        direction, new_pos = step
+        had_package = robot.has_package
+        if robot.move(direction, self.board):
+            # Проверяем, доставил ли робот посылку на этом шаге
+            if had_package and not robot.has_package:
+                # Робот доставил посылку, и его ход должен завершиться
+                logging.info(f"Robot {robot.index} delivered package at {new_pos}. Movement ends.")
+                return None  # Ход завершён после сдачи посылки
+
+            # Возвращаем новую позицию, если робот не сдавал посылку
+            return new_pos
+
+        logging.warning(f"Robot {robot.index} could not move {direction} to {new_pos}")
+        return None
+
+    def move_budgets(self):
+        """Лимит ходов каждого робота: поровну, остаток - первому роботу"""
         move_limit = self.player.move_limit_per_turn  # Лимит ходов для игрока
         num_robots = len(self.player.robots)  # Количество роботов у игрока
         base_moves_per_robot = move_limit // num_robots  # Основное количество ходов для каждого робота
         extra_moves = move_limit % num_robots  # Дополнительные ходы для первого робота
+        return {robot: base_moves_per_robot + (extra_moves if i == 0 else 0)
+                for i, robot in enumerate(self.player.robots)}
+
+    def robot_goal(self, robot):
+        """Цель робота: своя целевая клетка с посылкой или зелёная клетка над назначенной ему посылкой без неё"""
+        if robot.has_package:
+            return self.board.target_cells.get(robot.package.number)
+        return self.assigner.goal(robot)
 
+    def play(self):
+        started = time.perf_counter()
+        if self.search:
+            available_moves = self.play_lookahead()
+        else:
+            available_moves = self.play_cooperative() if self.cooperative else self.play_greedy()
+        self.board.metrics.observe('play_seconds', time.perf_counter() - started)
+        return available_moves
+
+    def play_lookahead(self):
+        """Ход по плану поиска с просмотром вперёд: шаги роботов в найденном порядке"""
+        return self.play_moves(self.search.search())
+
+    def play_moves(self, moves):
+        """Ход по готовому плану: шаги (номер робота, направление) по порядку, например посчитанные в фоне"""
+        available_moves = False
+        for index, direction in moves:
+            robot = self.player.robots[index]
+            if not robot.move(direction, self.board):
+                logging.warning(f"Robot {robot.index} could not follow the plan {direction}.")
+                break
+            available_moves = True
+        if not available_moves:
+            logging.info("No available moves, skipping turn.")
+        return available_moves
+
+    def play_cooperative(self):
+        """Ход автобота: план для всех роботов игрока за один проход по таблице резервирования.
+        Роботы ходят по шагам вперемешку, как в плане; после подбора посылки робот допланируется"""
+        budgets = self.move_budgets()
+        finished = set()  # Роботы, сдавшие посылку: их ход закончен
+        available_moves = False
+        for _ in range(MAX_PLAN_ROUNDS):
+            active = [robot for robot in self.player.robots if budgets[robot] > 0 and robot not in finished]
+            if not active:
+                break
+            static_robots = [robot for robot in self.board.robot_positions if robot not in active]
+            plans = self.planner.plan_turn([(robot, self.robot_goal(robot)) for robot in active], budgets,
+                                           static_robots)
+
+            moved = False
+            stuck = set()
+            for t in range(max(map(len, plans.values()), default=0)):
+                for robot, path in plans.items():
+                    if robot in finished or robot in stuck or t >= len(path) or path[t][0] is None:
+                        continue
+                    had_package = robot.has_package
+                    new_pos = self.make_step(robot, path[t])
+                    if new_pos is None and not (had_package and not robot.has_package):
+                        stuck.add(robot)  # План разошёлся с доской, робот ждёт следующего раунда
+                        continue
+                    budgets[robot] -= 1
+                    moved = available_moves = True
+                    if new_pos is None:
+                        logging.info(f"Robot {robot.index} delivered the package and is removed from the turn.")
+                        finished.add(robot)
+            if not moved:
+                break
+
+        for robot in self.player.robots:
+            if budgets[robot] == 0:
+                logging.info(f"Robot {robot.index} used all its moves for this turn.")
+        if not available_moves:
+            logging.info("No available moves, skipping turn.")
+        return available_moves
+
+    def play_greedy(self):
+        """Старый пошаговый ход: каждый робот идёт к своей цели, не зная о планах остальных"""
+        budgets = self.move_budgets()
         available_moves = False  # Флаг, указывающий на наличие доступных ходов
 
         # Движение роботов с посылками и без них
         robots = self.player.robots
-        for i, robot in enumerate(robots):
-            # Вычисляем количество ходов для этого робота
-            robot_move_limit = base_moves_per_robot + (extra_moves if i == 0 else 0)
-            remaining_moves = robot_move_limit
+        for robot in robots:
+            # Количество ходов для этого робота
+            remaining_moves = budgets[robot]
 
             while remaining_moves > 0:
                 if robot.has_package:
                     # Движение робота с посылкой
                     target_cell = self.find_target_cell(robot.package)
                     if target_cell:
-                        new_pos = self.move_robot_towards(robot, (target_cell.x, target_cell.y))
+                        new_pos = self.deliver_step(robot)
                         if new_pos is None:  # Если робот сдал посылку, удаляем его из списка
                             logging.info(f"Robot {robot.index} delivered the package and is removed from the turn.")
-                            robot.has_package = False  # Обновляем статус робота
                             break
                         remaining_moves -= 1
                         available_moves = True
@@ -155,15 +203,11 @@ class AutoPlay:
                         break
                 else:
                     # Движение робота без посылки
-                    packages = [cell.package for row in self.board.cells for cell in row if
-                                cell.package and not cell.package.picked_up]
-                    if not packages:
+                    target_pos = self.robot_goal(robot)
+                    if not target_pos:
                         logging.info(f"No packages available for robot {robot.index}.")
                         break
 
-                    closest_package = min(packages, key=lambda pkg: abs(robot.pos[0] - pkg.pos[0]) + abs(
-                        robot.pos[1] - pkg.pos[1]))
-                    target_pos = (closest_package.pos[0], closest_package.pos[1] - 1)
                     new_pos = self.move_robot_towards(robot, target_pos)
 
                     if new_pos:
@@ -182,47 +226,21 @@ class AutoPlay:
         return available_moves
 
     def find_path(self, robot, target_pos):
-        queue = deque()
-        visited = set()
-        parent = {}
-
-        start_pos = robot.pos
-        queue.append(start_pos)
-        visited.add(start_pos)
-        logging.debug(f"Starting BFS from {start_pos} to {target_pos}")
-
-        while queue:
-            current_pos = queue.popleft()
-            logging.debug(f"Visiting {current_pos}")
-
-            if current_pos == target_pos:
-                # Восстанавливаем путь
-                path = []
-                while current_pos != start_pos:
-                    prev_pos, direction = parent[current_pos]
-                    path.append((direction, current_pos))
-                    current_pos = prev_pos
-                path.reverse()
-                logging.debug(f"Path found: {path}")
-                return path
-            else:
-                directions = [
-                    ("up", (current_pos[0], current_pos[1] - 1)),
-                    ("down", (current_pos[0], current_pos[1] + 1)),
-                    ("left", (current_pos[0] - 1, current_pos[1])),
-                    ("right", (current_pos[0] + 1, current_pos[1]))
-                ]
-                for direction, new_pos in directions:
-                    if (0 <= new_pos[0] < self.board.size and
-                            0 <= new_pos[1] < self.board.size and
-                            new_pos not in visited):
-                        if self.is_valid_move(robot, new_pos):
-                            visited.add(new_pos)
-                            parent[new_pos] = (current_pos, direction)
-                            queue.append(new_pos)
-                        else:
-                            logging.debug(f"Move to {new_pos} is invalid.")
-                    else:
-                        logging.debug(f"Position {new_pos} is out of bounds or already visited.")
-        logging.warning(f"No path found from {start_pos} to {target_pos}")
-        return None
+        """Кратчайший путь с учётом занятых клеток: BFS слоями по битовым маскам доски (Board.bitboard),
+        каждый слой - все клетки на очередном расстоянии сразу"""
+        board = self.board
+        bitboard = board.bitboard
+        x, y = target_pos
+        if not (0 <= x < board.size and 0 <= y < board.size):
+            logging.warning(f"No path found from {robot.pos} to {target_pos}")
+            return None
+        logging.debug("Starting BFS from %s to %s", robot.pos, target_pos)
+        layers = bitboard.flood(bitboard.bit(robot.pos), board.allowed_bits(robot), bitboard.bit(target_pos))
+        if layers is None:
+            logging.warning(f"No path found from {robot.pos} to {target_pos}")
+            return None
+        board.metrics.count('bfs_nodes', sum(layer.bit_count() for layer in layers))
+        path = bitboard.trace(layers, target_pos)
+        logging.debug("Path found: %s", path)
+        board.metrics.observe('path_length', len(path))
+        return path
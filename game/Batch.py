@@ -0,0 +1,134 @@
+import argparse
+import logging
+import os
+import time
+from contextlib import nullcontext
+from multiprocessing import Pool
+from game.CompactBoard import CompactBoard
+from game.Game import Game
+from game.Metrics import METRICS, MetricsRecorder
+from game.Replay import ReplayRecorder
+from game.config import GameConfig
+
+BATCH_SIZE = 10000  # Сколько партий отдаём пулу за раз, чтобы не держать в памяти все run_count задач
+
+
+worker_game = None  # Партия процесса пула: карта грузится один раз, между зёрнами партия сбрасывается
+worker_initial = None  # Её снимок до расстановки роботов
+
+
+def init_worker(config, board_map, lookahead):
+    """Инициализация процесса: логи по каждому ходу в пакетном режиме не нужны; партия на карте создаётся сразу"""
+    global worker_game, worker_initial
+    logging.disable(logging.WARNING)
+    lookahead_ms, lookahead_nodes = lookahead
+    if board_map:
+        worker_game = Game(config, player_types=[1] * config.get_num_players(), colors=board_map,
+                           board_class=CompactBoard, seed=0, lookahead_ms=lookahead_ms, lookahead_nodes=lookahead_nodes)
+    else:
+        worker_game = Game(config, player_types=[1] * config.get_num_players(), seed=0, lookahead_ms=lookahead_ms,
+                           lookahead_nodes=lookahead_nodes)
+    worker_initial = worker_game.snapshot()
+
+
+def new_game(seed):
+    """Партия процесса с зерном seed - та же, что новая Game(seed=seed), но без загрузки карты:
+    снимок начала, генератор с зерна и посылки заново, как при сбросе в GameManager"""
+    game = worker_game
+    game.restore(worker_initial, rng=False)
+    game.seed = seed
+    game.random.seed(seed)
+    game.simulator.place_initial_packages()
+    return game
+
+
+def run_single_game(args):
+    """Одна партия: все игроки - автоботы, случайность задаётся зерном"""
+    seed, max_turns, replays, metrics = args
+    game = new_game(seed)
+    recorder = ReplayRecorder(game) if replays else None
+    metrics_recorder = MetricsRecorder(game) if metrics else None
+    winner = game.run(max_turns)
+    if recorder:
+        recorder.save(os.path.join(replays, f"{seed}.abr"))
+    game_metrics = metrics_recorder.delta(metrics_recorder.game_started) if metrics_recorder else None
+    for observer in (recorder, metrics_recorder):
+        if observer:
+            game.board.observers.remove(observer)  # Следующая партия процесса пишется своими
+    return (seed, winner.id + 1 if winner else 0, game.turns, game.deliveries, [player.score for player in game.players],
+            game_metrics)
+
+
+def run_batch(config, runs=None, workers=None, seed=0, output="results.csv", max_turns=1000, replays=None,
+              board_map=None, metrics=None, lookahead_ms=None, lookahead_nodes=None):
+    """Пакетный прогон: runs независимых партий на пуле процессов (по умолчанию run_count из конфига).
+    replays - папка для двоичных журналов партий (<seed>.abr), None - без журналов.
+    board_map - двоичная карта *.abm (python -m game.MapGenerator), None - стандартная карта из csv_files.
+    metrics - CSV с метриками горячих путей по партиям, None - без него.
+    lookahead_ms / lookahead_nodes - автоботы ищут ход с просмотром вперёд (game/Lookahead.py): бюджет по времени
+    или по числу узлов; по узлам партии повторяются по seed, по времени - нет"""
+    if replays:
+        os.makedirs(replays, exist_ok=True)
+    runs = config.run_count if runs is None else runs
+    workers = workers or os.cpu_count()
+    num_players = config.get_num_players()
+    wins = [0] * (num_players + 1)  # wins[0] - партии без победителя
+    total_turns = 0
+    total_deliveries = 0
+    total_scores = [0] * num_players
+    played = 0
+    started = time.perf_counter()
+
+    metric_names = list(METRICS.totals())
+
+    with open(output, "w") as results, open(metrics, "w") if metrics else nullcontext() as metrics_file, \
+            Pool(workers, initializer=init_worker,
+                 initargs=(config, board_map, (lookahead_ms, lookahead_nodes))) as pool:
+        results.write("seed,winner,turns,deliveries," + ",".join(f"score_{i + 1}" for i in range(num_players)) + "\n")
+        if metrics_file:
+            metrics_file.write("seed," + ",".join(metric_names) + "\n")
+        for start in range(0, runs, BATCH_SIZE):
+            tasks = ((seed + i, max_turns, replays, metrics)
+                     for i in range(start, min(runs, start + BATCH_SIZE)))
+            for game_seed, winner, turns, deliveries, scores, game_metrics in pool.imap_unordered(run_single_game,
+                                                                                                  tasks, chunksize=64):
+                results.write(f"{game_seed},{winner},{turns},{deliveries}," + ",".join(map(str, scores)) + "\n")
+                if metrics_file:
+                    metrics_file.write(f"{game_seed}," + ",".join(f"{game_metrics[name]:.9g}" for name in metric_names)
+                                       + "\n")
+                wins[winner] += 1
+                total_turns += turns
+                total_deliveries += deliveries
+                for i, score in enumerate(scores):
+                    total_scores[i] += score
+                played += 1
+
+    elapsed = time.perf_counter() - started
+    print(f"Games played: {played} in {elapsed:.2f}s ({played / elapsed if elapsed else 0:.1f} games/s)")
+    for i in range(num_players):
+        print(f"Player {i + 1}: {wins[i + 1]} wins, average score {total_scores[i] / max(played, 1):.2f}")
+    print(f"No winner: {wins[0]}")
+    print(f"Average turns: {total_turns / max(played, 1):.2f}, average deliveries: {total_deliveries / max(played, 1):.2f}")
+    return played
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный прогон партий автоботов без окна")
+    parser.add_argument("--config", default="game.config")
+    parser.add_argument("--runs", type=int, default=None, help="по умолчанию run_count из конфига")
+    parser.add_argument("--workers", type=int, default=None, help="по умолчанию по одному на ядро")
+    parser.add_argument("--seed", type=int, default=0, help="зерно первой партии, дальше seed + номер партии")
+    parser.add_argument("--output", default="results.csv")
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--replays", default=None, help="папка для журналов партий, проверка: python -m game.Replay")
+    parser.add_argument("--map", default=None, help="двоичная карта *.abm вместо csv_files")
+    parser.add_argument("--metrics", default=None, help="CSV с метриками по партиям: узлы поиска, время хода...")
+    parser.add_argument("--lookahead-ms", type=float, default=None, help="поиск с просмотром вперёд, мс на ход")
+    parser.add_argument("--lookahead-nodes", type=int, default=None, help="то же с пределом узлов вместо времени")
+    args = parser.parse_args()
+    run_batch(GameConfig(args.config), args.runs, args.workers, args.seed, args.output, args.max_turns,
+              args.replays, args.map, args.metrics, args.lookahead_ms, args.lookahead_nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from game.Assignment import allocate_packages
+from game.Board import Board
+from game.CompactBoard import CompactBoard
+from game.Game import Game
+from game.MapGenerator import MAP_SUFFIX, generate_grids, save_csv, save_map
+from game.MapTables import clear_shared_tables
+from game.VectorEnv import VectorEnv
+from game.config import GameConfig
+from game.consts import DIRECTIONS
+
+SIZES = (9, 32, 128, 512)
+ROBOTS = (1, 4)  # Роботов на игрока, игроков всегда двое
+BUDGET = 2.0  # Секунд на сценарий: медленные сценарии на больших картах делают меньше замеров
+REPEAT = 25  # Замеров на сценарий, если укладываемся в BUDGET
+CSV_LIMIT = 128  # Board из CSV на картах больше этой не грузим: слишком долго
+VECTOR_LIMIT = 128  # Пакетное окружение на картах больше этой не меряем: VECTOR_GAMES копий доски не помещаются в память
+BASELINE = "benchmark_baseline.json"
+VECTOR_GAMES = 4096  # Партий в пакетном окружении: шаг меряем сразу по всем
+THRESHOLD = 1.25  # Во сколько раз медленнее базовой линии (по минимуму замеров) - регрессия
+
+
+def measure(func, setup=None, number=1, repeat=REPEAT, budget=BUDGET):
+    """Время одного вызова func: медиана и минимум по замерам, в каждом замере number вызовов.
+    setup вызывается перед каждым замером и в время не входит"""
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < repeat and (not samples or time.perf_counter() - started < budget):
+        if setup:
+            setup()
+        begin = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - begin) / number)
+    return {"median_us": statistics.median(samples) * 1e6, "min_us": min(samples) * 1e6, "runs": len(samples)}
+
+
+class BenchmarkSuite:
+    """Сценарии на сгенерированных картах: сама игра через Game, карты - во временной папке"""
+
+    def __init__(self, sizes=SIZES, robots=ROBOTS, budget=BUDGET, render=True):
+        self.sizes = sizes
+        self.robots = robots
+        self.budget = budget
+        self.render = render
+        self.results = {}
+        self.temp_dir = tempfile.TemporaryDirectory(prefix="antbot-bench-")
+        self.folder = self.temp_dir.name
+        self.config = GameConfig("game.config")
+
+    def map_files(self, size):
+        """Карта size x size в обоих форматах: двоичная и пара CSV"""
+        colors, targets = generate_grids(size)
+        binary = os.path.join(self.folder, f"{size}{MAP_SUFFIX}")
+        if not os.path.exists(binary):
+            save_map(binary, size, colors, targets)
+            if size <= CSV_LIMIT:
+                save_csv(os.path.join(self.folder, f"{size}_colors.csv"),
+                         os.path.join(self.folder, f"{size}_targets.csv"), size, colors, targets)
+        return binary, os.path.join(self.folder, f"{size}_colors.csv"), os.path.join(self.folder, f"{size}_targets.csv")
+
+    def record(self, name, stats):
+        self.results[name] = stats
+        print(f"{name:55s} {stats['median_us']:14.1f} us  (min {stats['min_us']:.1f}, {stats['runs']} runs)")
+
+    def make_game(self, size, robots_per_player):
+        config = copy.copy(self.config)
+        config.players_info = [2, 1, 1]
+        config.robots_per_player = robots_per_player
+        binary, _, _ = self.map_files(size)
+        game = Game(config, colors=binary, board_class=CompactBoard, seed=0)
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        for _ in range(2):  # Разогрев: таблицы расстояний и поля построены
+            game.play_turn()
+        return game
+
+    def run(self):
+        try:
+            for size in self.sizes:
+                self.bench_load(size)
+                for robots_per_player in self.robots:
+                    self.bench_game(size, robots_per_player)
+        finally:
+            self.temp_dir.cleanup()  # Сгенерированные карты после замеров не нужны
+        return self.results
+
+    def bench_load(self, size):
+        binary, colors, targets = self.map_files(size)
+        # Таблицы карты общие для досок процесса: забываем их, чтобы мерить загрузку с нуля
+        self.record(f"load_from_file/CompactBoard/size={size}",
+                    measure(lambda: CompactBoard(binary, None), setup=clear_shared_tables, budget=self.budget))
+        if size <= CSV_LIMIT:
+            self.record(f"load_from_file/Board/size={size}",
+                        measure(lambda: Board(colors, targets), setup=clear_shared_tables, budget=self.budget))
+
+    def bench_game(self, size, robots_per_player):
+        game = self.make_game(size, robots_per_player)
+        board = game.board
+        autoplay = game.get_auto_play(game.current_player)
+        player = autoplay.player
+        snapshot = game.snapshot()
+        suffix = f"size={size}/robots={2 * robots_per_player}"
+
+        def restore():
+            game.restore(snapshot)
+            autoplay.planner.plans.clear()  # Иначе с того же снимка план берётся из кэша и ход не считается
+
+        def restore_cold():
+            # Роботы снимка стоят на клетках, поля до которых уже в кэше: забываем их, чтобы мерить и BFS
+            restore()
+            board.distance_fields.clear()
+
+        moves = [(robot, (robot.pos[0] + dx, robot.pos[1] + dy))
+                 for robot in board.robot_positions for dx, dy in DIRECTIONS.values()]
+        self.record(f"is_valid_move/{suffix}",
+                    measure(lambda: [board.is_valid_move(robot, pos) for robot, pos in moves],
+                            number=100, budget=self.budget))
+        robots = list(board.robot_positions)
+        self.record(f"legal_moves/{suffix}", measure(lambda: board.legal_moves(robots), number=100, budget=self.budget))
+
+        robot = player.robots[0]
+        goal = autoplay.robot_goal(robot)
+        if goal:
+            board.distance_field(goal)  # Поле расстояний до цели - эвристика планировщика, меряем сам поиск
+            self.record(f"find_path/{suffix}", measure(lambda: autoplay.find_path(robot, goal), budget=self.budget))
+            horizon = player.move_limit_per_turn + 2
+            self.record(f"planner_find_path/{suffix}",
+                        measure(lambda: autoplay.planner.find_path(robot, goal, horizon), budget=self.budget))
+
+        packages = list(board.available_packages.values())
+        empty = [robot for robot in player.robots if not robot.has_package]
+        self.record(f"allocate_packages/{suffix}",
+                    measure(lambda: allocate_packages(empty, packages, board), budget=self.budget))
+        self.record(f"allocate_packages_cold/{suffix}",
+                    measure(lambda: allocate_packages(empty, packages, board), setup=board.distance_fields.clear,
+                            budget=self.budget))
+        self.record(f"play_turn/{suffix}", measure(autoplay.play, setup=restore, budget=self.budget))
+        self.record(f"play_turn_cold/{suffix}", measure(autoplay.play, setup=restore_cold, budget=self.budget))
+        if size <= VECTOR_LIMIT:
+            env = VectorEnv(game.config, board, VECTOR_GAMES, seed=0)
+            actions = env.random_actions()
+            self.record(f"vector_env_step/{suffix}/games={VECTOR_GAMES}",
+                        measure(lambda: env.step(actions), number=10, budget=self.budget))
+        else:
+            print(f"{'vector_env_step/' + suffix:55s} skipped, map is over {VECTOR_LIMIT}")
+
+        if self.render:
+            self.bench_render(game, autoplay, restore, suffix)
+
+    def bench_render(self, game, autoplay, restore, suffix):
+        """Кадр целиком после invalidate и кадр после хода (только грязные прямоугольники)"""
+        import pygame
+        from game.Renderer import Renderer
+        from game.consts import DEFAULT_IMAGE_SIZE
+        screen = pygame.display.set_mode((DEFAULT_IMAGE_SIZE[0] * 15, DEFAULT_IMAGE_SIZE[1] * 11))
+        renderer = Renderer(screen, game.board, game.players, turbo=True)
+        game.simulator.renderer = renderer
+        game.simulator.ScreenAnimator()
+
+        def full():
+            renderer.invalidate()
+
+        def turn():
+            restore()
+            autoplay.play()
+
+        self.record(f"screen_animator_full/{suffix}",
+                    measure(game.simulator.ScreenAnimator, setup=full, budget=self.budget))
+        self.record(f"screen_animator_turn/{suffix}",
+                    measure(game.simulator.ScreenAnimator, setup=turn, budget=self.budget))
+        game.board.observers.remove(renderer)
+        game.simulator.renderer = None
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Сравнение с базовой линией по минимумам: они меньше медиан зависят от фоновой нагрузки.
+    Возвращает список регрессий"""
+    regressions = []
+    print(f"\n{'scenario':55s} {'baseline':>12s} {'now':>12s} {'ratio':>7s}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = stats["min_us"] / base["min_us"] if base["min_us"] else 1.0
+        mark = " <- regression" if ratio > threshold else ""
+        print(f"{name:55s} {base['min_us']:12.1f} {stats['min_us']:12.1f} {ratio:7.2f}{mark}")
+        if mark:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры горячих путей: планирование, ход, загрузка, отрисовка")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--robots", type=int, nargs="+", default=ROBOTS, help="роботов на игрока")
+    parser.add_argument("--budget", type=float, default=BUDGET, help="секунд на сценарий")
+    parser.add_argument("--no-render", action="store_true", help="без замеров отрисовки (нет pygame)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="записать результаты как базовую линию")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if not args.no_render:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Отрисовка во внеэкранную поверхность
+        import pygame
+        pygame.init()
+
+    suite = BenchmarkSuite(args.sizes, args.robots, args.budget, render=not args.no_render)
+    results = suite.run()
+    report = {
+        "meta": {"python": sys.version.split()[0], "platform": platform.platform(),
+                 "machine": platform.machine(), "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=1)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions over x{args.threshold}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+from game.consts import DIRECTIONS
+
+FLAG_TABLE = bytes([0] + [1] * 255)  # Байт флага -> 0 или 1
+
+
+class Bitboard:
+    """Множество клеток доски - одно большое целое, по биту на клетку: бит y * stride + x.
+    stride на единицу больше стороны доски: лишний столбец всегда пуст, поэтому сдвиг влево или вправо
+    не переносит клетку на соседнюю строку. Шаг во все стороны сразу - четыре сдвига и маска"""
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        # Все клетки доски без разделителей: строка из size единиц, повторённая size раз с шагом stride
+        # (сумма геометрической прогрессии)
+        self.full = ((1 << size) - 1) * ((1 << (self.stride * size)) - 1) // ((1 << self.stride) - 1)
+        # Шаг в направлении - сдвиг номера бита: вверх - на строку к младшим битам и т.д.
+        self.steps = [(direction, dy * self.stride + dx, dx, dy) for direction, (dx, dy) in DIRECTIONS.items()]
+        self.window = (1 << (2 * self.stride + 1)) - 1  # Три строки вокруг клетки: от соседа сверху до соседа снизу
+
+    def bit(self, pos):
+        return 1 << (pos[1] * self.stride + pos[0])
+
+    def mask(self, flags):
+        """Маска из флагов по клеткам в порядке y * size + x (как Board.passable, у CompactBoard - bytearray).
+        Байт на клетку с нулевым байтом-разделителем после каждой строки, затем каждые восемь байт
+        сжимаются в байт битов: три сдвига всего числа вместо цикла по клеткам"""
+        size = self.size
+        cells = bytes(flags).translate(FLAG_TABLE)
+        rows = bytearray()
+        for y in range(size):
+            rows += cells[y * size:(y + 1) * size]
+            rows.append(0)
+        rows += bytes(-len(rows) % 8)
+        count = len(rows)
+        value = int.from_bytes(rows, 'little')  # Флаг клетки i - бит 8 * i
+        value = (value | value >> 7) & int.from_bytes(b'\x03\x00' * (count // 2), 'little')
+        value = (value | value >> 14) & int.from_bytes(b'\x0f\x00\x00\x00' * (count // 4), 'little')
+        value = (value | value >> 28) & int.from_bytes((b'\xff' + bytes(7)) * (count // 8), 'little')
+        return int.from_bytes(value.to_bytes(count, 'little')[::8], 'little')
+
+    def neighbours(self, mask):
+        """Соседи клеток mask по четырём направлениям"""
+        stride = self.stride
+        return ((mask << 1) | (mask >> 1) | (mask << stride) | (mask >> stride)) & self.full
+
+    def flood(self, start, allowed, goal):
+        """BFS слоями: каждый слой - все клетки на следующем расстоянии от start сразу, по клеткам allowed.
+        Возвращает список слоёв до слоя с goal включительно или None, если goal недостижима"""
+        layers = [start]
+        visited = frontier = start
+        while not frontier & goal:
+            frontier = self.neighbours(frontier) & allowed & ~visited
+            if not frontier:
+                return None
+            visited |= frontier
+            layers.append(frontier)
+        return layers
+
+    def trace(self, layers, goal_pos):
+        """Путь по слоям flood от start до goal_pos: список (direction, клетка) как у AutoPlay.find_path"""
+        path = []
+        x, y = goal_pos
+        for layer in reversed(layers[:-1]):
+            for direction, (dx, dy) in DIRECTIONS.items():
+                px, py = x - dx, y - dy
+                if 0 <= px < self.size and 0 <= py < self.size and layer & self.bit((px, py)):
+                    path.append((direction, (x, y)))
+                    x, y = px, py
+                    break
+        path.reverse()
+        return path
+
@@ -1,6 +1,20 @@
 import csv
+import logging
+import random
+from array import array
+from collections import deque
+from game.Bitboard import Bitboard
 from game.Cell import Cell
+from game.FlowField import FlowField
+from game.MapTables import MapTables, shared_tables
+from game.Metrics import METRICS
 from game.Package import Package
+from game.Zobrist import carry_key, package_key, robot_key
+from game.consts import DIRECTIONS, WALKABLE_COLORS
+
+FULL_CACHE_CELLS = 1024  # На картах до стольких клеток кэш держит поля до всех клеток, без вытеснения
+DISTANCE_CACHE_SIZE = 256  # Сколько полей расстояний держим в памяти на больших картах
+DISTANCE_CACHE_CELLS = 1 << 24  # Но не больше стольких клеток во всех полях вместе (по 4 байта на клетку)
 
 
 class Board:
@@ -8,6 +22,10 @@ class Board:
         self.cells = list()
         self.load_from_file(colors, targets)
         self.size = len(self.cells)
+        self.setup()
+
+    def setup(self):
+        """Производные структуры доски: списки клеток по цветам, таблица расстояний, поля целей"""
         self.current_player_index = 0
 
         self.yellow_cells = self.get_cells_by_color('y')
@@ -16,10 +34,44 @@ class Board:
         self.blue_cells = self.get_cells_by_color('b')
         self.white_cells = self.get_cells_by_color('w')
         self.occupied_cells = {}
+        self.robot_positions = {}  # Робот -> позиция
+        self.available_packages = {}  # Позиция -> посылка, которую ещё не подобрали
+        self.observers = []
+        self.build_distance_table()
+        self.target_cells = self.find_target_cells()
+        self.package_range = max(self.target_cells, default=9)  # Номера посылок - от 1 до номера последней цели
+        self.flow_fields = {}  # Поля по номерам целей строятся при первом запросе
+        self.random = random  # Генератор случайных чисел партии; Game подменяет его своим
+        self.metrics = METRICS  # Куда считать метрики горячих путей; у теневых копий партии - свой экземпляр
+        self.hash = 0  # Хэш Зобриста роботов, их груза и посылок на доске; обновляется при каждом изменении
+        self.robots_hash = 0  # Его часть только по клеткам роботов: от неё зависят планы путей
+        self.build_bitboards()
+
+    def build_bitboards(self):
+        """Маски клеток для проверки шагов сдвигами: проходимые без целей, цели по номеру посылки, занятые"""
+        self.bitboard = Bitboard(self.size)
+        self.passable_bits = self.bitboard.mask(self.passable)
+        # Цели, на которые можно встать со своей посылкой
+        self.own_targets = {number: pos for number, pos in self.target_cells.items()
+                            if self.cells[pos[1]][pos[0]].color in WALKABLE_COLORS}
+        self.occupied_bits = 0
 
     def __getitem__(self, index):
         return self.cells[index]
 
+    def add_observer(self, observer):
+        """Наблюдатель: подписка на события доски (например, отрисовка)"""
+        self.observers.append(observer)
+
+    def notify(self, event, *args):
+        for observer in self.observers:
+            handler = getattr(observer, 'on_' + event, None)
+            if handler:
+                handler(*args)
+
+    def find_target_cells(self):
+        return {cell.target: (cell.x, cell.y) for row in self.cells for cell in row if cell.target}
+
     def get_cells_by_color(self, color):
         return [cell for row_cell in self.cells for cell in row_cell if cell.color == color]
 
@@ -51,18 +103,230 @@ class Board:
                 if (j - 1) >= 0:
                     self.cells[i][j].left = self.cells[i][j - 1]
 
+    def is_valid_move(self, robot, new_pos):
+        x, y = new_pos
+        if 0 <= x < self.size and 0 <= y < self.size:
+            target_cell = self.cells[y][x]
+            # Проверяем, занята ли клетка другим роботом
+            if self.is_occupied(new_pos):
+                logging.debug("Cell at %s is occupied by another robot.", new_pos)
+                return False
+            # Проверяем, является ли клетка целевой
+            if target_cell.target:
+                if robot.package and target_cell.target == robot.package.number:
+                    logging.debug("Cell at %s is robot's own target cell.", new_pos)
+                    pass  # Разрешаем движение
+                else:
+                    logging.debug("Cell at %s is a target cell for another package. Move not allowed.", new_pos)
+                    return False  # Запрещаем движение на чужие целевые клетки
+            # Проверяем цвет клетки
+            if target_cell.color in WALKABLE_COLORS:
+                logging.debug("Cell at %s is valid for movement.", new_pos)
+                return True
+            else:
+                logging.debug("Cell at %s has invalid color '%s'.", new_pos, target_cell.color)
+                return False
+        logging.debug("Cell at %s is out of bounds.", new_pos)
+        return False
+
+    def own_target(self, robot):
+        return self.own_targets.get(robot.package.number) if robot.package else None
+
+    def allowed_bits(self, robot):
+        """Куда робот может встать: то же, что is_valid_move, для всех клеток сразу"""
+        allowed = self.passable_bits
+        target = self.own_target(robot)
+        if target:
+            allowed |= self.bitboard.bit(target)
+        return allowed & ~self.occupied_bits
+
+    def legal_moves(self, robots):
+        """Допустимые шаги сразу для группы роботов: {робот: [(direction, new_pos), ...]} в порядке DIRECTIONS.
+        Маска свободных клеток строится одна на всех, от неё у робота берётся окно из трёх строк вокруг него:
+        на большой карте сдвигается большое целое только раз на робота"""
+        bitboard = self.bitboard
+        stride = bitboard.stride
+        free = self.passable_bits & ~self.occupied_bits
+        moves = {}
+        for robot in robots:
+            x, y = robot.pos
+            base = (y - 1) * stride + x  # Бит 0 окна - клетка сверху, бит 2 * stride - снизу
+            window = (free >> base if base >= 0 else free << -base) & bitboard.window
+            target = self.own_target(robot)
+            moves[robot] = [(direction, (x + dx, y + dy)) for direction, offset, dx, dy in bitboard.steps
+                            if window >> (offset + stride) & 1 or
+                            (x + dx, y + dy) == target and target not in self.occupied_cells]
+        return moves
+
+    def build_distance_table(self):
+        """Таблицы расстояний: цвета и цели статичны после загрузки, поэтому поле до клетки строится один раз,
+        при первом запросе, и дальше берётся из кэша. Таблицы общие для всех досок с той же картой (MapTables).
+        Чужие целевые клетки непроходимы, поэтому в поле цель может быть только конечной точкой"""
+        self.tables = shared_tables((type(self), self.map_key()), self.build_map_tables)
+        self.passable = self.tables.passable
+        self.neighbour_indexes = self.tables.neighbour_indexes
+        self.distance_fields = self.tables.fields
+
+    def build_map_tables(self):
+        cells_count = self.size * self.size
+        if cells_count <= FULL_CACHE_CELLS:
+            cache_size = cells_count
+        else:
+            cache_size = max(1, min(DISTANCE_CACHE_SIZE, DISTANCE_CACHE_CELLS // cells_count))
+        passable = self.build_passable()
+        return MapTables(passable, self.build_neighbour_indexes(passable), cache_size)
+
+    def map_key(self):
+        """Карта целиком - цвета и цели: по ней доски делят статичные таблицы"""
+        return self.size, ''.join(cell.color for row in self.cells for cell in row), \
+            tuple(cell.target for row in self.cells for cell in row)
+
+    def build_passable(self):
+        return [cell.color in WALKABLE_COLORS and not cell.target for row in self.cells for cell in row]
+
+    def build_neighbour_indexes(self, passable):
+        return [
+            tuple((y + dy) * self.size + x + dx for dx, dy in DIRECTIONS.values()
+                  if 0 <= x + dx < self.size and 0 <= y + dy < self.size)
+            for y in range(self.size) for x in range(self.size)
+        ]
+
+    def distance_field(self, target_pos):
+        """Поле расстояний до target_pos по статичной карте (-1 - недостижимо), с LRU-кэшем для больших карт"""
+        field = self.tables.get(target_pos)
+        if field is None:
+            field = self.build_distance_field(target_pos[1] * self.size + target_pos[0])
+            self.tables.put(target_pos, field)
+        return field
+
+    def build_distance_field(self, start):
+        """Поиск в ширину от клетки start по проходимым клеткам"""
+        field = array('i', [-1]) * (self.size * self.size)
+        field[start] = 0
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for neighbour in self.neighbour_indexes[current]:
+                if field[neighbour] < 0 and self.passable[neighbour]:
+                    field[neighbour] = field[current] + 1
+                    queue.append(neighbour)
+        return field
+
+    def distance(self, start_pos, target_pos):
+        """Длина кратчайшего пути без учёта роботов или None, если цель недостижима"""
+        field = self.distance_field(target_pos)
+        x, y = start_pos
+        dist = field[y * self.size + x]
+        if dist >= 0 or start_pos == target_pos:
+            return max(dist, 0)
+        # Робот может стоять на целевой клетке, которой нет в поле: считаем через соседей
+        best = None
+        for dx, dy in DIRECTIONS.values():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.size and 0 <= ny < self.size and field[ny * self.size + nx] >= 0:
+                if best is None or field[ny * self.size + nx] + 1 < best:
+                    best = field[ny * self.size + nx] + 1
+        return best
+
+    def next_step(self, robot, target_pos):
+        """Следующий шаг по таблице расстояний: свободная соседняя клетка, которая ближе к цели.
+        Возвращает (direction, new_pos) или None, если все кратчайшие шаги заняты роботами"""
+        field = self.distance_field(target_pos)
+        x, y = robot.pos
+        current = field[y * self.size + x]
+        if current < 0:
+            current = len(field)
+        best = None
+        for direction, (dx, dy) in DIRECTIONS.items():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.size and 0 <= ny < self.size:
+                dist = field[ny * self.size + nx]
+                if 0 <= dist < current and (best is None or dist < best[0]) and \
+                        self.is_valid_move(robot, (nx, ny)):
+                    best = (dist, direction, (nx, ny))
+        return (best[1], best[2]) if best else None
+
+    def flow_step(self, robot):
+        """Шаг робота с посылкой по полю своей цели или None, если путь сейчас перекрыт"""
+        flow_field = self.flow_field(robot.package.number)
+        return flow_field.next_step(robot) if flow_field else None
+
+    def flow_field(self, number):
+        """Поле расстояний до цели с номером number с учётом текущих роботов (пошаговый режим AutoPlay)"""
+        flow_field = self.flow_fields.get(number)
+        if flow_field is None and number in self.target_cells:
+            flow_field = FlowField(self, self.target_cells[number])
+            for pos in self.occupied_cells:
+                flow_field.set_blocked(pos, True)
+            self.flow_fields[number] = flow_field
+        return flow_field
+
     def is_occupied(self, new_pos):
         return new_pos in self.occupied_cells
 
-    def occupied(self, new_pos):
-        self.occupied_cells[new_pos] = True
+    def occupied(self, new_pos, robot=True):
+        self.occupied_cells[new_pos] = robot
+        self.occupied_bits |= self.bitboard.bit(new_pos)
+        if robot is not True:
+            self.robot_positions[robot] = new_pos
+            key = robot_key(robot.player.id, robot.index, new_pos)
+            self.hash ^= key
+            self.robots_hash ^= key
+        for flow_field in self.flow_fields.values():
+            flow_field.set_blocked(new_pos, True)
+
+    def vacate(self, pos):
+        """Робот ушёл с клетки. Возвращает этого робота"""
+        robot = self.occupied_cells.pop(pos, True)
+        self.occupied_bits &= ~self.bitboard.bit(pos)
+        if self.robot_positions.pop(robot, None) is not None:
+            key = robot_key(robot.player.id, robot.index, pos)
+            self.hash ^= key
+            self.robots_hash ^= key
+        for flow_field in self.flow_fields.values():
+            flow_field.set_blocked(pos, False)
+        return robot
 
     def update_position(self, old_pos, new_pos):
-        if self.is_occupied(old_pos):
-            del self.occupied_cells[old_pos]
-        self.occupied(new_pos)
+        self.occupied(new_pos, self.vacate(old_pos))
 
     def place_package(self, pos):
-        package = Package(pos)
+        """Новая посылка на клетку; прежняя посылка с неё убирается (например, при новой партии)"""
+        self.remove_package(pos)
+        package = Package(pos, self.random.randint(1, self.package_range))
         self.cells[pos[1]][pos[0]].package = package
+        self.available_packages[pos] = package
+        self.hash ^= package_key(pos, package.number)
+        self.notify('package_placed', package)
         return package
+
+    def restore_package(self, package):
+        """Посылка из снимка состояния: кладётся на клетку без события package_placed"""
+        self.cells[package.pos[1]][package.pos[0]].package = package
+        self.available_packages[package.pos] = package
+        self.hash ^= package_key(package.pos, package.number)
+
+    def remove_package(self, pos):
+        """Посылку забрали с клетки"""
+        package = self.available_packages.pop(pos, None)
+        if package is not None:
+            self.hash ^= package_key(pos, package.number)
+        self.cells[pos[1]][pos[0]].package = None
+
+    def rehash(self):
+        """Хэш с нуля: после восстановления снимка и для проверки инкрементального"""
+        robots = 0
+        value = 0
+        for robot, pos in self.robot_positions.items():
+            robots ^= robot_key(robot.player.id, robot.index, pos)
+            if robot.package:
+                value ^= carry_key(robot.player.id, robot.index, robot.package.number)
+        for pos, package in self.available_packages.items():
+            value ^= package_key(pos, package.number)
+        self.robots_hash = robots
+        self.hash = value ^ robots
+        return self.hash
+
+    def target_cell(self, number):
+        pos = self.target_cells.get(number)
+        return self.cells[pos[1]][pos[0]] if pos else None
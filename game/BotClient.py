@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import logging
+import random
+from game.CommandServer import DEFAULT_HOST, DEFAULT_PORT
+from game.Commands import format_position, parse_position
+from game.consts import DIRECTIONS
+
+MAX_ATTEMPTS = 20  # Сколько отказов сервера подряд терпит бот, прежде чем закончить ход командой END
+
+
+class BotClient:
+    """Простой внешний бот для проверки сервера команд: ставит роботов и ходит ими наугад.
+    Свои роботы отслеживаются по событиям EVENT PLACED / EVENT MOVED"""
+
+    def __init__(self, player, size=9, seed=None):
+        self.player = player  # номер игрока с единицы, как в GAMER
+        self.size = size
+        self.random = random.Random(seed)
+        self.robots = {}  # номер робота -> клетка
+        self.attempts = 0
+        self.phase = None
+        self.commands_sent = 0
+        self.games = 0
+
+    def next_command(self):
+        self.attempts += 1
+        if self.attempts > MAX_ATTEMPTS and self.phase == "MOVING":
+            return "END"
+        if self.phase == "PLACING":
+            return f"PUT BOT {format_position((self.random.randrange(self.size), self.random.randrange(self.size)))}"
+        if not self.robots:
+            return "END"
+        x, y = self.random.choice(list(self.robots.values()))
+        dx, dy = self.random.choice(list(DIRECTIONS.values()))
+        if not (0 <= x + dx < self.size and 0 <= y + dy < self.size):
+            return "END"
+        return f"MOVE {format_position((x, y))}-{format_position((x + dx, y + dy))}"
+
+    def on_line(self, line):
+        """Строка от сервера -> команда, которую надо отправить, или None"""
+        parts = line.split()
+        if not parts:
+            return None
+        if parts[0] == "ERR":
+            return self.next_command() if self.phase else None
+        if parts[0] != "EVENT":
+            return None
+        if parts[1] in ("PLACED", "MOVED") and int(parts[2]) == self.player:
+            self.robots[int(parts[3])] = parse_position(parts[-1])
+        elif parts[1] == "NEW":
+            self.robots.clear()
+            self.games += 1
+        elif parts[1] == "TURN":
+            if int(parts[2]) != self.player:
+                self.phase = None
+                return None
+            self.phase = parts[3]
+            self.attempts = 0
+            return self.next_command()
+        return None
+
+    async def play(self, reader, writer, max_commands=None):
+        """Играть, пока сервер не закроет соединение или не будет отправлено max_commands команд"""
+        writer.write(f"GAMER {self.player}\n".encode())
+        while max_commands is None or self.commands_sent < max_commands:
+            line = await reader.readline()
+            if not line:
+                break
+            command = self.on_line(line.decode().strip())
+            if command:
+                writer.write(command.encode() + b'\n')
+                self.commands_sent += 1
+                await writer.drain()
+        writer.close()
+
+
+async def run_bot(player, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, seed=None, max_commands=None):
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    bot = BotClient(player, seed=seed)
+    await bot.play(reader, writer, max_commands)
+    return bot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бот-заглушка для сервера команд")
+    parser.add_argument("player", type=int, help="номер игрока, как в GAMER")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-commands", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    bot = asyncio.run(run_bot(args.player, args.host, args.port, args.unix, args.seed, args.max_commands))
+    logging.info(f"Bot {args.player} sent {bot.commands_sent} commands over {bot.games + 1} games.")
+
+
+if __name__ == "__main__":
+    main()
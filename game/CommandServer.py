@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from game.Commands import (parse_command, format_position, parse_position, GamerCommand, PutBotCommand, MoveCommand,
+                           EndCommand)
+from game.Game import Game
+from game.Logs import EventLog, setup_logging
+from game.Metrics import MetricsRecorder, serve_metrics
+from game.TurnScheduler import TurnScheduler
+from game.config import GameConfig
+from game.consts import DIRECTION_BY_DELTA
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+
+
+class ClientSession:
+    """Подключённый клиент: сокет или stdin/stdout. Команды GAMER привязывают его к игроку"""
+
+    def __init__(self, name, write):
+        self.name = name
+        self.write = write  # функция записи байтов клиенту
+        self.player = None  # индекс игрока с нуля
+
+    def send(self, line):
+        self.write(line.encode() + b'\n')
+
+
+class CommandServer:
+    """Игра для внешних ботов: тот же язык команд, что и в режиме 2 (GAMER / PUT BOT / MOVE / END),
+    но по TCP, Unix-сокету или stdin. Клиент командой GAMER n занимает игрока-человека (0 в конфиге),
+    ходит только в свою очередь и получает в ответ OK / ERR <причина>, а все клиенты - события EVENT ...
+    Автоботы (1 в конфиге) ходят на сервере сами. END - клиент заканчивает свой ход досрочно"""
+
+    def __init__(self, config):
+        self.config = config
+        self.player_types = config.players_info[1:]
+        self.sessions = []
+        self.games = 0
+        self.new_game()
+
+    def new_game(self):
+        """Первая партия создаётся, следующие - восстановлением начального снимка с новыми посылками"""
+        if self.games == 0:
+            self.game = Game(self.config, player_types=self.player_types)
+            self.simulator = self.game.simulator
+            self.game.board.add_observer(self)
+            self.metrics = MetricsRecorder(self.game)
+            self.initial_state = self.game.snapshot()
+        else:
+            self.game.restore(self.initial_state, rng=False)
+            self.simulator.place_initial_packages()
+        self.scheduler = TurnScheduler(self.game)
+        self.games += 1
+        self.last_turn = None  # последнее разосланное EVENT TURN с номерами партии, хода и расстановки
+
+    # События доски - рассылаются всем клиентам
+
+    def broadcast(self, line):
+        for session in self.sessions:
+            session.send(line)
+
+    def on_robot_placed(self, robot):
+        self.broadcast(f"EVENT PLACED {robot.player.id + 1} {robot.index + 1} {format_position(robot.pos)}")
+
+    def on_robot_moved(self, robot, old_pos):
+        self.broadcast(f"EVENT MOVED {robot.player.id + 1} {robot.index + 1} "
+                       f"{format_position(old_pos)} {format_position(robot.pos)}")
+
+    def on_package_placed(self, package):
+        if not self.simulator.placing_phase:
+            self.broadcast(f"EVENT PACKAGE {format_position(package.pos)} {package.number}")
+
+    def on_package_visibility_changed(self):
+        if not self.simulator.placing_phase:
+            for pos, package in self.game.board.available_packages.items():
+                self.broadcast(f"EVENT PACKAGE {format_position(pos)} {package.number}")
+
+    def on_package_picked(self, robot, package):
+        self.broadcast(f"EVENT PICKED {robot.player.id + 1} {robot.index + 1} {package.number}")
+
+    def on_package_dropped(self, robot, package):
+        self.broadcast(f"EVENT DROPPED {robot.player.id + 1} {robot.index + 1} {robot.player.score}")
+
+    def turn_event(self):
+        player = self.game.current_player
+        phase = "PLACING" if self.simulator.placing_phase else "MOVING"
+        return f"EVENT TURN {player.id + 1} {phase} {player.remaining_moves}"
+
+    def announce_turn(self):
+        """Сообщить, чей ход, если что-то поменялось"""
+        turn = self.turn_event()
+        key = (turn, self.games, self.game.turns, self.simulator.robots_placed)
+        if key != self.last_turn:
+            self.last_turn = key
+            self.broadcast(turn)
+
+    # Выполнение команд
+
+    def advance(self):
+        """После хода человека: догоняем очередь, играем за автоботов, при победе начинаем новую партию"""
+        while True:
+            self.scheduler.sync()
+            if self.game.winner:
+                self.broadcast(f"EVENT WINNER {self.game.winner.id + 1}")
+                logging.info(f"Game {self.games} won by player {self.game.winner.id + 1}, starting a new one.")
+                self.new_game()
+                self.broadcast(f"EVENT NEW GAME {self.games}")
+                continue
+            if not self.scheduler.is_automatic() or not self.scheduler.step():
+                break
+        self.announce_turn()
+
+    def execute(self, session, command):
+        """Команда клиента -> ответ OK ... или ERR ..."""
+        if isinstance(command, GamerCommand):
+            if session.player is not None:
+                return f"ERR already playing as {session.player + 1}"
+            if not 0 <= command.player < len(self.player_types):
+                return f"ERR no player {command.player + 1}"
+            if self.player_types[command.player] != 0:
+                return f"ERR player {command.player + 1} is an autobot"
+            if any(other.player == command.player for other in self.sessions):
+                return f"ERR player {command.player + 1} is taken"
+            session.player = command.player
+            logging.info(f"Client {session.name} plays as player {command.player + 1}.")
+            return f"OK player {command.player + 1}"
+
+        if session.player is None:
+            return "ERR send GAMER n first"
+        if self.simulator.current_player != session.player:
+            return f"ERR not your turn, player {self.simulator.current_player + 1} moves"
+
+        if isinstance(command, PutBotCommand):
+            if not self.simulator.placing_phase:
+                return "ERR placing phase is over"
+            x, y = parse_position(command.pos)
+            placed = self.simulator.robots_placed
+            self.simulator.place_robot_at_position(x, y)
+            if self.simulator.robots_placed == placed:
+                return f"ERR cannot place a robot at {command.pos}"
+            return "OK"
+
+        if self.simulator.placing_phase:
+            return "ERR placing phase is not over"
+
+        if isinstance(command, MoveCommand):
+            return self.move(command.path)
+        if isinstance(command, EndCommand):
+            self.simulator.switch_to_next_player()
+            return "OK"
+        return "ERR unknown command"
+
+    def move(self, path):
+        """MOVE c3-c2-d2: робот игрока на c3 идёт по соседним клеткам, пока хватает ходов"""
+        steps = [parse_position(step) for step in path.split('-')]
+        player = self.game.current_player
+        robot = next((robot for robot in player.robots if robot.pos == steps[0]), None)
+        if robot is None:
+            return f"ERR no robot of yours at {format_position(steps[0])}"
+        if len(steps) - 1 > player.remaining_moves:
+            return f"ERR only {player.remaining_moves} moves left"
+
+        done = 0
+        for step in steps[1:]:
+            dx, dy = step[0] - robot.pos[0], step[1] - robot.pos[1]
+            direction = DIRECTION_BY_DELTA.get((dx, dy))
+            if direction is None or not robot.move(direction, self.game.board):
+                break
+            player.remaining_moves -= 1
+            done += 1
+        if player.remaining_moves <= 0:
+            self.simulator.switch_to_next_player()
+        if done < len(steps) - 1:
+            return f"ERR invalid step to {format_position(steps[done + 1])}, {done} of {len(steps) - 1} done"
+        return "OK"
+
+    def handle_line(self, session, line):
+        line = line.strip()
+        if not line:
+            return
+        command = parse_command(line)
+        if command is None:
+            session.send(f"ERR invalid command: {line}")
+            return
+        session.send(self.execute(session, command))
+        self.advance()
+
+    # Транспорт
+
+    def open_session(self, name, write):
+        session = ClientSession(name, write)
+        self.sessions.append(session)
+        logging.info(f"Client {name} connected.")
+        session.send(self.turn_event())
+        return session
+
+    def close_session(self, session):
+        self.sessions.remove(session)
+        logging.info(f"Client {session.name} disconnected.")
+
+    async def handle_client(self, reader, writer):
+        peer = writer.get_extra_info('peername') or 'unix'
+        session = self.open_session(str(peer), writer.write)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.handle_line(session, line.decode('utf-8', errors='replace'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.close_session(session)
+            writer.close()
+
+    async def handle_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(data):
+            sys.stdout.buffer.write(data)
+            sys.stdout.flush()
+
+        session = self.open_session('stdin', write)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.handle_line(session, line.decode('utf-8', errors='replace'))
+        self.close_session(session)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, use_stdin=False):
+        """Принимать клиентов до остановки процесса. port=None - без TCP"""
+        self.advance()  # автоботы, которые расставляются раньше людей
+        servers = []
+        if port is not None:
+            servers.append(await asyncio.start_server(self.handle_client, host, port))
+            logging.info(f"Command server listening on {host}:{port}.")
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            servers.append(await asyncio.start_unix_server(self.handle_client, unix_path))
+            logging.info(f"Command server listening on {unix_path}.")
+        tasks = [asyncio.create_task(server.serve_forever()) for server in servers]
+        if use_stdin:
+            tasks.append(asyncio.create_task(self.handle_stdin()))
+        if not tasks:
+            logging.error("Command server has nothing to listen on.")
+            return
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for server in servers:
+                server.close()
+
+
+def run_server(config, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, use_stdin=False, metrics_port=None,
+               events=False):
+    """metrics_port - локальная точка опроса метрик: /metrics (Prometheus) и /metrics.csv (по ходам).
+    events - писать события партий в канал antbot.events (файл задаёт setup_logging)"""
+    if 0 not in config.players_info[1:]:
+        logging.error("Command server needs at least one player of type 0 to bind clients to.")
+        return
+    server = CommandServer(config)
+    if events:
+        EventLog(server.game)
+    if metrics_port:
+        serve_metrics(metrics_port, server.metrics)
+        logging.info(f"Metrics available on http://127.0.0.1:{metrics_port}/metrics.")
+    try:
+        asyncio.run(server.serve(host, port, unix_path, use_stdin))
+    except KeyboardInterrupt:
+        logging.info("Command server stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер команд режима 2 для внешних ботов")
+    parser.add_argument("--config", default="game.config")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 - без TCP")
+    parser.add_argument("--unix", default=None, help="путь к Unix-сокету")
+    parser.add_argument("--stdin", action="store_true", help="принимать команды и со stdin")
+    parser.add_argument("--metrics-port", type=int, default=None, help="порт для опроса метрик, только localhost")
+    parser.add_argument("--log", default=None, help="текстовый лог с ротацией, кроме stderr")
+    parser.add_argument("--events", default=None, help="журнал событий партий в JSON lines")
+    args = parser.parse_args()
+    setup_logging(args.log, events=args.events)
+    run_server(GameConfig(args.config), args.host, args.port or None, args.unix, args.stdin, args.metrics_port,
+               bool(args.events))
+
+
+if __name__ == "__main__":
+    main()
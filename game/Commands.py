@@ -0,0 +1,116 @@
+import logging
+import os
+import re
+from collections import namedtuple
+from game.consts import column_name
+
+# Команды режима 2 (commands.txt): GAMER n, PUT BOT c3, MOVE c3-c2-d2, END
+GamerCommand = namedtuple('GamerCommand', 'player')   # номер игрока с нуля
+PutBotCommand = namedtuple('PutBotCommand', 'pos')    # клетка вида 'c3'
+MoveCommand = namedtuple('MoveCommand', 'path')       # путь вида 'c3-c2-d2'
+EndCommand = namedtuple('EndCommand', '')
+
+# Одна грамматика на все команды, скомпилированная один раз.
+# Клетка - столбец буквами как в таблицах (a..z, aa..az, ...) и строка числом с единицы: c3, ab120
+POSITION = r"[a-z]+[1-9]\d*"
+COMMAND_RE = re.compile(
+    r"GAMER (?P<gamer>\d+)"
+    rf"|PUT BOT (?P<put>{POSITION})"
+    rf"|MOVE (?P<move>{POSITION}(?:-{POSITION})+)"
+    r"|(?P<end>END)"
+)
+POSITION_RE = re.compile(r"([a-zA-Z]+)(\d+)")
+
+
+def column_index(name):
+    """'a' -> 0, 'aa' -> 26"""
+    index = 0
+    for letter in name.lower():
+        index = index * 26 + ord(letter) - ord('a') + 1
+    return index - 1
+
+
+def format_position(pos):
+    """(x, y) -> клетка вида 'c3'"""
+    return f"{column_name(pos[0])}{pos[1] + 1}"
+
+
+def parse_position(text):
+    """Клетка вида 'c3' или 'ab120' -> (x, y)"""
+    match = POSITION_RE.fullmatch(text.strip())
+    if not match:
+        raise ValueError(f"Invalid position: {text}")
+    return column_index(match[1]), int(match[2]) - 1
+
+
+def parse_command(line):
+    """Строка -> объект команды, None - если строка не команда"""
+    match = COMMAND_RE.fullmatch(line.strip())
+    if not match:
+        return None
+    if match['gamer'] is not None:
+        return GamerCommand(int(match['gamer']) - 1)
+    if match['put'] is not None:
+        return PutBotCommand(match['put'])
+    if match['move'] is not None:
+        return MoveCommand(match['move'])
+    return EndCommand()
+
+
+class CommandStream:
+    """Потоковое чтение файла команд: помним смещение и читаем только дописанные байты.
+    Об изменении файла узнаём по stat, так что опрос без изменений почти ничего не стоит"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.tail = b''        # недописанная строка (без перевода строки в конце)
+        self.signature = None  # (inode, размер, время изменения) при последнем чтении
+
+    def changed(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if signature == self.signature:
+            return False
+        if self.signature is not None and (stat.st_ino != self.signature[0] or stat.st_size < self.offset):
+            logging.warning(f"Command file {self.path} was replaced, reading it from the start.")
+            self.offset = 0
+            self.tail = b''
+        self.signature = signature
+        return True
+
+    def poll(self):
+        """Новые команды с прошлого опроса: только строки с переводом строки в конце.
+        Недописанная строка ждёт перевода строки или close, сколько бы файл ни стоял без изменений"""
+        if not self.changed():
+            return []
+
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read()
+        self.offset += len(data)
+        lines = (self.tail + data).split(b'\n')
+        self.tail = lines.pop()
+        return self.parse(lines)
+
+    def close(self):
+        """Конец ввода: дочитать файл и разобрать последнюю строку, даже если перевода строки после неё нет"""
+        commands = self.poll()
+        line, self.tail = self.tail, b''
+        return commands + self.parse([line])
+
+    def parse(self, lines):
+        commands = []
+        for line in lines:
+            line = line.decode('utf-8', errors='replace').strip()
+            if not line:
+                continue
+            command = parse_command(line)
+            if command is None:
+                logging.warning(f"Invalid command: {line}")
+            else:
+                commands.append(command)
+        return commands
@@ -0,0 +1,257 @@
+import csv
+from array import array
+from itertools import compress
+from game.Board import Board
+from game.Cell import Cell
+from game.MapGenerator import MAP_SUFFIX, generate_grids, load_map
+from game.consts import WALKABLE_COLORS
+
+# Таблицы для bytes.translate: маска проходимых цветов и маска клеток без цели
+WALKABLE_TABLE = bytes(1 if chr(code) in WALKABLE_COLORS else 0 for code in range(256))
+EMPTY_TABLE = bytes([1] + [0] * 255)
+
+
+class CellView:
+    """Лёгкое представление клетки компактной доски: данные лежат в массивах доски, объект создаётся по запросу"""
+    __slots__ = ('board', 'x', 'y')
+    colors = Cell.colors
+
+    def __init__(self, board, y, x):
+        self.board = board
+        self.x = x
+        self.y = y
+
+    @property
+    def index(self):
+        return self.y * self.board.size + self.x
+
+    @property
+    def color(self):
+        return chr(self.board.colors[self.index])
+
+    @property
+    def target(self):
+        return self.board.targets[self.index]
+
+    @property
+    def robot(self):
+        return self.board.occupied_cells.get((self.x, self.y))
+
+    @property
+    def package(self):
+        return self.board.packages.get(self.index)
+
+    @package.setter
+    def package(self, package):
+        if package is None:
+            self.board.packages.pop(self.index, None)
+            self.board.package_numbers[self.index] = 0
+        else:
+            self.board.packages[self.index] = package
+            self.board.package_numbers[self.index] = package.number or 0
+
+
+class CellRow:
+    __slots__ = ('board', 'y')
+
+    def __init__(self, board, y):
+        self.board = board
+        self.y = y
+
+    def __len__(self):
+        return self.board.size
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.board.size:
+            raise IndexError(x)
+        return CellView(self.board, self.y, x)
+
+    def __iter__(self):
+        return (CellView(self.board, self.y, x) for x in range(self.board.size))
+
+
+class CellGrid:
+    """board.cells[y][x] для компактной доски"""
+    __slots__ = ('board',)
+
+    def __init__(self, board):
+        self.board = board
+
+    def __len__(self):
+        return self.board.size
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.board.size:
+            raise IndexError(y)
+        return CellRow(self.board, y)
+
+    def __iter__(self):
+        return (CellRow(self.board, y) for y in range(self.board.size))
+
+
+class ColorCells:
+    """Клетки одного цвета: хранятся только индексы, CellView создаётся при обращении"""
+    __slots__ = ('board', 'indexes')
+
+    def __init__(self, board, indexes):
+        self.board = board
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, i):
+        idx = self.indexes[i]
+        return CellView(self.board, idx // self.board.size, idx % self.board.size)
+
+    def __iter__(self):
+        size = self.board.size
+        return (CellView(self.board, idx // size, idx % size) for idx in self.indexes)
+
+
+class NeighbourIndexes:
+    """Соседи клеток без таблицы кортежей на каждую клетку: карта с рамкой из непроходимых клеток,
+    строится один раз при загрузке. В ней соседи клетки p - это p - width, p + width, p - 1 и p + 1
+    (в порядке DIRECTIONS), и поиску в ширину не нужны проверки границ"""
+    __slots__ = ('size', 'width', 'padded', 'cell_index')
+
+    def __init__(self, size, passable):
+        self.size = size
+        self.width = width = size + 1  # Столбец рамки справа служит и левой рамкой следующей строки
+        cells_count = width * (size + 2)  # И по строке рамки сверху и снизу
+        self.padded = bytearray(cells_count)  # Проходимость клеток в раскладке с рамкой, рамка - 0
+        self.cell_index = array('i', [-1]) * cells_count  # Индекс с рамкой -> y * size + x, у рамки -1
+        for y in range(size):
+            start = (y + 1) * width
+            self.padded[start:start + size] = passable[y * size:(y + 1) * size]
+            self.cell_index[start:start + size] = array('i', range(y * size, (y + 1) * size))
+
+    def __getitem__(self, idx):
+        cell_index, width = self.cell_index, self.width
+        p = idx + idx // self.size + width
+        return tuple(neighbour for neighbour in (cell_index[p - width], cell_index[p + width],
+                                                 cell_index[p - 1], cell_index[p + 1]) if neighbour >= 0)
+
+    def distance_field(self, start):
+        """Поиск в ширину от клетки start по слоям: открытые клетки закрываются при первом посещении,
+        поэтому на соседа - одна проверка байта"""
+        cell_index, width = self.cell_index, self.width
+        field = array('i', [-1]) * (self.size * self.size)
+        field[start] = 0
+        open_cells = bytearray(self.padded)
+        p = start + start // self.size + width
+        open_cells[p] = 0
+        layer = [p]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer = []
+            append = next_layer.append
+            for p in layer:
+                # Четыре соседа без цикла: это самое горячее место поиска
+                neighbour = p - width
+                if open_cells[neighbour]:
+                    open_cells[neighbour] = 0
+                    field[cell_index[neighbour]] = distance
+                    append(neighbour)
+                neighbour = p + width
+                if open_cells[neighbour]:
+                    open_cells[neighbour] = 0
+                    field[cell_index[neighbour]] = distance
+                    append(neighbour)
+                neighbour = p - 1
+                if open_cells[neighbour]:
+                    open_cells[neighbour] = 0
+                    field[cell_index[neighbour]] = distance
+                    append(neighbour)
+                neighbour = p + 1
+                if open_cells[neighbour]:
+                    open_cells[neighbour] = 0
+                    field[cell_index[neighbour]] = distance
+                    append(neighbour)
+            layer = next_layer
+        return field
+
+
+class CompactBoard(Board):
+    """Доска на плоских массивах: цвет, цель, номер посылки и занятость - по байту на клетку.
+    Клетки (CellView) создаются только по запросу, например для отрисовки"""
+
+    def load_from_file(self, colors_map, targets_map=None):
+        """CSV-пара как у Board или двоичная карта *.abm (тогда targets_map не нужен)"""
+        if colors_map.endswith(MAP_SUFFIX):
+            self.load_from_grids(*load_map(colors_map))
+            return
+        with open(colors_map, mode='r') as colors_map_file, open(targets_map, mode='r') as targets_map_file:
+            color_rows = list(csv.reader(colors_map_file))
+            target_rows = list(csv.reader(targets_map_file))
+        self.load_from_grids(len(color_rows),
+                             ''.join(''.join(row) for row in color_rows).encode(),
+                             bytes(int(target) for row in target_rows for target in row))
+
+    def load_from_grids(self, size, colors, targets):
+        """Загрузка из готовых массивов размера size * size: коды цветов (b'w', b'a', ...) и номера целей"""
+        self.size = size
+        self.colors = bytearray(colors)
+        self.targets = bytearray(targets)
+        self.package_numbers = bytearray(size * size)
+        self.occupancy = bytearray(size * size)
+        self.packages = {}
+        self.cells = CellGrid(self)
+
+    @classmethod
+    def from_grids(cls, size, colors, targets):
+        board = cls.__new__(cls)
+        board.load_from_grids(size, colors, targets)
+        board.setup()
+        return board
+
+    @classmethod
+    def generate(cls, size, targets=9):
+        """Сгенерированная карта склада size x size (см. MapGenerator)"""
+        return cls.from_grids(size, *generate_grids(size, targets))
+
+    def color_mask(self, color):
+        """Маска клеток цвета color: bytes из 0 и 1 по клетке"""
+        code = ord(color)
+        return self.colors.translate(bytes(1 if i == code else 0 for i in range(256)))
+
+    def occupancy_mask(self):
+        return bytes(self.occupancy)
+
+    def color_indexes(self, color):
+        code = ord(color)
+        idx = self.colors.find(code)
+        while idx != -1:
+            yield idx
+            idx = self.colors.find(code, idx + 1)
+
+    def get_cells_by_color(self, color):
+        indexes = array('i', compress(range(self.size * self.size), self.color_mask(color)))
+        return ColorCells(self, indexes)
+
+    def find_target_cells(self):
+        return {target: (idx % self.size, idx // self.size) for idx, target in enumerate(self.targets) if target}
+
+    def map_key(self):
+        return self.size, bytes(self.colors), bytes(self.targets)
+
+    def build_passable(self):
+        cells_count = self.size * self.size
+        walkable = int.from_bytes(self.colors.translate(WALKABLE_TABLE), 'big')
+        without_target = int.from_bytes(self.targets.translate(EMPTY_TABLE), 'big')
+        return bytearray((walkable & without_target).to_bytes(cells_count, 'big'))
+
+    def build_neighbour_indexes(self, passable):
+        return NeighbourIndexes(self.size, passable)
+
+    def build_distance_field(self, start):
+        return self.neighbour_indexes.distance_field(start)
+
+    def occupied(self, new_pos, robot=True):
+        self.occupancy[new_pos[1] * self.size + new_pos[0]] = 1
+        super().occupied(new_pos, robot)
+
+    def vacate(self, pos):
+        self.occupancy[pos[1] * self.size + pos[0]] = 0
+        return super().vacate(pos)
@@ -0,0 +1,114 @@
+import heapq
+from array import array
+from collections import deque
+from game.consts import DIRECTIONS
+
+INFINITY = 1 << 30
+
+
+class FlowField:
+    """Поле расстояний до одной целевой клетки с учётом роботов-препятствий.
+    Строится из статичной таблицы доски, а при перемещении роботов чинится локально, без полного BFS"""
+
+    def __init__(self, board, target_pos):
+        self.board = board
+        self.size = board.size
+        self.target = target_pos[1] * self.size + target_pos[0]
+        self.blocked = bytearray(self.size * self.size)
+        self.pending = {}  # Изменения занятости, ещё не применённые к полю: индекс клетки -> занята ли
+        self.field = array('i', (dist if dist >= 0 else INFINITY for dist in board.distance_field(target_pos)))
+
+    def neighbours(self, idx):
+        return self.board.neighbour_indexes[idx]
+
+    def is_open(self, idx):
+        return self.board.passable[idx] and not self.blocked[idx]
+
+    def set_blocked(self, pos, blocked):
+        """Отложенное изменение: поле чинится только когда его спрашивают, встречные изменения взаимно гасятся"""
+        self.pending[pos[1] * self.size + pos[0]] = blocked
+
+    def sync(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        # Сначала освобождаем клетки, потом занимаем: так чинка не видит устаревших препятствий
+        for idx, blocked in pending.items():
+            if not blocked and self.blocked[idx]:
+                self.unblock(idx)
+        for idx, blocked in pending.items():
+            if blocked and not self.blocked[idx]:
+                self.block(idx)
+
+    def block(self, idx):
+        """Робот встал на клетку: расстояния, которые держались только через неё, пересчитываем"""
+        if idx == self.target:
+            return
+        self.blocked[idx] = 1
+        field = self.field
+        if field[idx] >= INFINITY:
+            return
+
+        # Клетки, у которых не осталось соседа на расстоянии на единицу меньше, теряют расстояние
+        old = {idx: field[idx]}
+        field[idx] = INFINITY
+        queue = deque([idx])
+        while queue:
+            u = queue.popleft()
+            for v in self.neighbours(u):
+                if v in old or field[v] != old[u] + 1 or not self.is_open(v):
+                    continue
+                if any(field[w] == field[v] - 1 for w in self.neighbours(v)):
+                    continue
+                old[v] = field[v]
+                field[v] = INFINITY
+                queue.append(v)
+
+        # Затронутые клетки получают расстояния от границы нетронутой области
+        heap = []
+        for v in old:
+            if v == idx:
+                continue
+            best = min((field[w] + 1 for w in self.neighbours(v) if field[w] < INFINITY), default=INFINITY)
+            if best < INFINITY:
+                field[v] = best
+                heap.append((best, v))
+        heapq.heapify(heap)
+        while heap:
+            dist, u = heapq.heappop(heap)
+            if dist > field[u]:
+                continue
+            for v in self.neighbours(u):
+                if dist + 1 < field[v] and self.is_open(v):
+                    field[v] = dist + 1
+                    heapq.heappush(heap, (dist + 1, v))
+
+    def unblock(self, idx):
+        """Робот ушёл с клетки: расстояния через неё могут только уменьшиться"""
+        self.blocked[idx] = 0
+        if not self.board.passable[idx]:
+            return
+        field = self.field
+        field[idx] = min((field[w] + 1 for w in self.neighbours(idx) if field[w] < INFINITY), default=INFINITY)
+        if field[idx] >= INFINITY:
+            return
+        queue = deque([idx])
+        while queue:
+            u = queue.popleft()
+            for v in self.neighbours(u):
+                if field[u] + 1 < field[v] and self.is_open(v):
+                    field[v] = field[u] + 1
+                    queue.append(v)
+
+    def next_step(self, robot):
+        """Шаг вниз по градиенту: свободный сосед с наименьшим расстоянием до цели"""
+        self.sync()
+        x, y = robot.pos
+        best = None
+        for direction, (dx, dy) in DIRECTIONS.items():
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.size and 0 <= ny < self.size:
+                dist = self.field[ny * self.size + nx]
+                if dist < INFINITY and (best is None or dist < best[0]) and not self.board.is_occupied((nx, ny)):
+                    best = (dist, direction, (nx, ny))
+        return (best[1], best[2]) if best else None
@@ -0,0 +1,177 @@
+import logging
+import random
+from collections import namedtuple
+from game.Board import Board
+from game.Package import Package
+from game.Player import Player
+from game.PlayerSimulator import PlayerSimulator
+from game.AutoPlay import AutoPlay
+from game.Lookahead import LookaheadSearch
+from game.Metrics import Metrics
+from game.Robot import Robot
+from game.Zobrist import turn_key
+
+PLAYER_COLORS = [('blue', 0), ('red', 1), ('green', 2), ('orange', 3)]
+
+# Снимок изменяемого состояния партии, только кортежи:
+# robots - по игроку кортеж (клетка, клетка посылки или None, номер посылки) на робота,
+# packages - (клетка, номер, подобрана, видима) для посылок на доске,
+# players - (очки, оставшиеся ходы), simulator - (текущий игрок, текущий робот, роботов по игрокам,
+# всего расставлено, идёт расстановка), counters - (ходы, доставки, индекс победителя), rng - состояние генератора партии
+GameSnapshot = namedtuple('GameSnapshot', 'robots packages players simulator counters rng')
+
+
+class Game:
+    """Партия без отрисовки: доска, игроки, очередь ходов и автоботы. pygame здесь не нужен"""
+
+    def __init__(self, config, player_types=None, colors="csv_files/colors.csv", targets="csv_files/targets.csv",
+                 board_class=Board, seed=None, lookahead_ms=None, lookahead_nodes=None, metrics=None):
+        self.config = config
+        # Своя последовательность случайных чисел на партию: по seed партию можно повторить
+        self.seed = seed if seed is not None else random.randrange(1 << 63)
+        self.random = random.Random(self.seed)
+        self.map_files = (colors, targets)  # По ним поиск с просмотром вперёд строит свою копию партии
+        self.lookahead = (lookahead_ms, lookahead_nodes)
+        self.board = board_class(colors, targets)
+        self.board.random = self.random
+        if metrics is not None:
+            self.board.metrics = metrics  # Копии партии для поиска и планирования не считают в общие METRICS
+        self.players = [
+            Player(color=color, num_robots=config.robots_per_player, idx=idx,
+                   move_limit_per_turn=config.move_limit_per_turn)
+            for color, idx in PLAYER_COLORS[:config.get_num_players()]
+        ]
+        self.simulator = PlayerSimulator(self.players, self.board)
+        if player_types is None:
+            player_types = config.players_info[1:]
+        self.auto_play = [AutoPlay(player, self.board) for player_type, player in
+                          zip(player_types, self.players) if player_type == 1]
+        self.auto_play_by_player = {auto_play.player: auto_play for auto_play in self.auto_play}
+        if lookahead_ms or lookahead_nodes:
+            # Автоботы ищут ход с просмотром вперёд: по времени или, для повторяемых партий, по числу узлов
+            for auto_play in self.auto_play:
+                auto_play.search = LookaheadSearch(self, auto_play.player, lookahead_ms or 0, lookahead_nodes)
+        self.turns = 0
+        self.deliveries = 0
+        self.winner = None
+        self.board.add_observer(self)
+
+    @property
+    def current_player(self):
+        return self.players[self.simulator.current_player]
+
+    def get_auto_play(self, player):
+        return self.auto_play_by_player.get(player)
+
+    def on_package_dropped(self, robot, package):
+        self.deliveries += 1
+
+    def place_robot_automatically(self):
+        """Расстановка: автобот текущего игрока ставит одного робота на случайную свободную белую клетку"""
+        autoplay = self.get_auto_play(self.current_player)
+        random_pos = autoplay.get_random_white_cell_position()
+        if not random_pos:
+            logging.error("No white cells available to place robot.")
+            return False
+        self.simulator.place_robot_at_position(random_pos[0], random_pos[1])
+        return True
+
+    def play_turn(self):
+        """Ход автобота текущего игрока, проверка победы и передача хода"""
+        self.get_auto_play(self.current_player).play()
+        self.end_turn()
+
+    def end_turn(self):
+        """Подсчёт очков после хода и передача хода следующему игроку"""
+        self.check_winner()
+        self.board.notify('turn_ended', self.current_player)
+        self.simulator.switch_to_next_player()
+        self.turns += 1
+
+    @property
+    def state_hash(self):
+        """64-битный хэш Зобриста позиции: роботы, их груз, посылки на доске и чей ход"""
+        return self.board.hash ^ turn_key(self.simulator.current_player, self.simulator.placing_phase)
+
+    def shadow(self, player_types):
+        """Копия партии на той же карте для поиска и планирования: состояние в неё приходит через restore,
+        таблицы карты общие с этой партией, а метрики свои - ходы копии не считаются в метрики живой"""
+        colors, targets = self.map_files
+        lookahead_ms, lookahead_nodes = self.lookahead
+        return Game(self.config, player_types=player_types, colors=colors, targets=targets,
+                    board_class=type(self.board), seed=0, lookahead_ms=lookahead_ms,
+                    lookahead_nodes=lookahead_nodes, metrics=Metrics())
+
+    def snapshot(self):
+        """Снимок всего изменяемого состояния: доска, роботы и карта не копируются"""
+        simulator = self.simulator
+        return GameSnapshot(
+            tuple(tuple((robot.pos, robot.package.pos, robot.package.number) if robot.package else
+                        (robot.pos, None, None) for robot in player.robots) for player in self.players),
+            tuple((pos, package.number, package.picked_up, package.visible)
+                  for pos, package in self.board.available_packages.items()),
+            tuple((player.score, player.remaining_moves) for player in self.players),
+            (simulator.current_player, simulator.current_robot_index, tuple(simulator.current_robot_counts),
+             simulator.robots_placed, simulator.placing_phase),
+            (self.turns, self.deliveries, self.winner.id if self.winner else None),
+            self.random.getstate())
+
+    def restore(self, snapshot, rng=True):
+        """Вернуть партию к снимку. Объекты роботов переиспользуются, наблюдатели получают state_restored.
+        rng=False - не трогать генератор случайных чисел"""
+        board = self.board
+        for pos in list(board.occupied_cells):
+            board.vacate(pos)
+        for player, robots in zip(self.players, snapshot.robots):
+            del player.robots[len(robots):]
+            for index, (pos, package_pos, number) in enumerate(robots):
+                if index < len(player.robots):
+                    robot = player.robots[index]
+                    robot.pos = pos
+                else:
+                    robot = Robot(pos, index, player)
+                    player.add_robot(robot)
+                robot.package = None
+                if package_pos is not None:
+                    robot.package = Package(package_pos, number)
+                    robot.package.pick_up()
+                board.occupied(pos, robot)
+
+        for pos in list(board.available_packages):
+            board.remove_package(pos)
+        for pos, number, picked_up, visible in snapshot.packages:
+            package = Package(pos, number)
+            package.picked_up = picked_up
+            package.visible = visible
+            board.restore_package(package)
+
+        for player, (score, remaining_moves) in zip(self.players, snapshot.players):
+            player.score = score
+            player.remaining_moves = remaining_moves
+        simulator = self.simulator
+        (simulator.current_player, simulator.current_robot_index, counts,
+         simulator.robots_placed, simulator.placing_phase) = snapshot.simulator
+        simulator.current_robot_counts = list(counts)
+        self.turns, self.deliveries, winner = snapshot.counters
+        self.winner = self.players[winner] if winner is not None else None
+        if rng:
+            self.random.setstate(snapshot.rng)
+        board.rehash()  # Груз роботов восстановлен мимо pick_package
+        board.notify('state_restored')
+
+    def check_winner(self):
+        for player in self.players:
+            if player.score >= self.config.win_score:
+                self.winner = player
+                player.win()
+                return player
+        return None
+
+    def run(self, max_turns=1000):
+        """Прогон партии целиком: только если все игроки - автоботы"""
+        while self.simulator.placing_phase:
+            if not self.place_robot_automatically():
+                return None
+        while self.winner is None and self.turns < max_turns:
+            self.play_turn()
+        return self.winner
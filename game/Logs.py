@@ -0,0 +1,184 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s - %(message)s'
+MAX_BYTES = 10 * 1024 * 1024  # Размер файла лога, после которого он уходит в game.log.1 и т.д.
+BACKUP_COUNT = 3
+BATCH_SIZE = 512  # Сколько записей пишем за один проход до сброса на диск
+EVENTS_LOGGER = 'antbot.events'
+
+
+class BatchFileHandler(RotatingFileHandler):
+    """Файл с ротацией по размеру, который не сбрасывается на диск после каждой записи: сброс делает LogWriter
+    после пачки записей"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class QuietFilter(logging.Filter):
+    """Отбрасывает записи потока, который сейчас внутри quiet(): например, ходы, проигранные поиском"""
+    local = threading.local()
+
+    def filter(self, record):
+        return not getattr(self.local, 'quiet', False)
+
+
+QUIET_FILTER = QuietFilter()
+
+
+@contextmanager
+def quiet():
+    """Логи текущего потока не пишутся; другие потоки пишут как обычно"""
+    root = logging.getLogger()
+    if QUIET_FILTER not in root.filters:
+        root.addFilter(QUIET_FILTER)
+    previous = getattr(QuietFilter.local, 'quiet', False)
+    QuietFilter.local.quiet = True
+    try:
+        yield
+    finally:
+        QuietFilter.local.quiet = previous
+
+
+class RecordQueueHandler(QueueHandler):
+    """Кладёт запись в очередь без копирования: у логгера это единственный обработчик.
+    Сообщение собирается сразу, чтобы аргументы не менялись, пока запись ждёт в очереди"""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogWriter(threading.Thread):
+    """Фоновый поток: забирает записи из очереди пачками и отдаёт обработчикам, потом один раз сбрасывает файлы.
+    Игровой поток только кладёт запись в очередь и не ждёт диска"""
+
+    def __init__(self, records, handlers):
+        super().__init__(name='log-writer', daemon=True)
+        self.records = records
+        self.handlers = handlers
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.records.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            for record in batch:
+                if record is None:  # Сигнал остановки: дописываем пачку и выходим
+                    stopping = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                getattr(handler, 'flush_batch', handler.flush)()
+
+    def stop(self):
+        self.records.put(None)
+        self.join()
+        for handler in self.handlers:
+            handler.close()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Событие из extra={'event': {...}} - одна строка JSON с меткой времени"""
+
+    def format(self, record):
+        return json.dumps({'time': round(record.created, 6), **record.event}, separators=(',', ':'))
+
+
+class EventLog:
+    """Наблюдатель доски: структурные события партии в отдельный канал antbot.events (JSON lines),
+    отдельно от текстового лога"""
+
+    def __init__(self, game, logger=None):
+        self.game = game
+        self.logger = logger or logging.getLogger(EVENTS_LOGGER)
+        game.board.add_observer(self)
+
+    def emit(self, kind, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(kind, extra={'event': {'event': kind, 'turn': self.game.turns, **fields}})
+
+    def on_robot_placed(self, robot):
+        self.emit('placed', player=robot.player.id + 1, robot=robot.index + 1, pos=robot.pos)
+
+    def on_robot_moved(self, robot, old_pos):
+        self.emit('moved', player=robot.player.id + 1, robot=robot.index + 1, old=old_pos, pos=robot.pos)
+
+    def on_package_placed(self, package):
+        self.emit('package', pos=package.pos, number=package.number)
+
+    def on_package_picked(self, robot, package):
+        self.emit('picked', player=robot.player.id + 1, robot=robot.index + 1, number=package.number)
+
+    def on_package_dropped(self, robot, package):
+        self.emit('dropped', player=robot.player.id + 1, robot=robot.index + 1, number=package.number,
+                  score=robot.player.score)
+
+    def on_turn_ended(self, player):
+        self.emit('turn', player=player.id + 1, scores=[player.score for player in self.game.players])
+
+    def on_state_restored(self):
+        self.emit('restored')
+
+
+def setup_logging(path='game.log', level=logging.INFO, console=True, events=None, max_bytes=MAX_BYTES,
+                  backups=BACKUP_COUNT):
+    """Асинхронные логи: корневой логгер и канал событий пишут только в очередь, файлы и консоль -
+    в фоновом потоке пачками. path - текстовый лог с ротацией (None - только консоль),
+    events - JSON lines событий (None - без него). При выходе из процесса очередь дописывается сама"""
+    records = queue.SimpleQueue()
+    handlers = []
+
+    if path:
+        file_handler = BatchFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        file_handler.setLevel(level)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        file_handler.addFilter(lambda record: record.name != EVENTS_LOGGER)
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(level)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        console_handler.addFilter(lambda record: record.name != EVENTS_LOGGER)
+        handlers.append(console_handler)
+
+    events_logger = logging.getLogger(EVENTS_LOGGER)
+    events_logger.propagate = False
+    if events:
+        events_handler = BatchFileHandler(events, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        events_handler.setFormatter(JsonLinesFormatter())
+        events_handler.addFilter(lambda record: record.name == EVENTS_LOGGER)
+        handlers.append(events_handler)
+        events_logger.setLevel(logging.INFO)
+        events_logger.addHandler(RecordQueueHandler(records))
+    else:
+        events_logger.setLevel(logging.CRITICAL + 1)  # Канал выключен: EventLog даже не собирает словари
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(RecordQueueHandler(records))
+
+    writer = LogWriter(records, handlers)
+    writer.start()
+    atexit.register(writer.stop)
+    return writer
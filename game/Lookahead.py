@@ -0,0 +1,164 @@
+import time
+from game.Assignment import allocate_packages, pickup_cell
+from game.AutoPlay import AutoPlay
+from game.Logs import quiet
+from game.MoveRecorder import MoveRecorder
+from game.Zobrist import TranspositionTable
+
+DELIVERY_VALUE = 100  # Сданная посылка
+CARRY_VALUE = 50  # Посылка у робота, минус расстояние до её цели
+OPPONENT_WEIGHT = 0.5  # Насколько нам мешает продвижение соперников
+START_WIDTH = 4  # Ширина луча первого прохода, дальше удваивается, пока есть время
+VALUE_CACHE_SIZE = 65536  # Оценки позиций по хэшу: проходы луча и соседние ходы видят одни и те же позиции
+
+
+class LookaheadSearch:
+    """Поиск хода с просмотром вперёд в пределах бюджета времени (anytime beam search).
+    Узел - последовательность шагов роботов игрока (номер робота, направление) и снимок партии после них.
+    Ищем на своей копии партии: снимок живой партии восстанавливается в неё, и наблюдатели живой доски
+    (отрисовка, журналы) проигранных ходов не видят. Первый кандидат - план кооперативного планировщика,
+    дальше проходы лучом растущей ширины; по истечении бюджета возвращается лучший найденный план.
+    max_nodes - предел узлов вместо времени, чтобы партии повторялись по seed"""
+
+    def __init__(self, game, player, budget_ms=50, max_nodes=None):
+        self.game = game
+        self.player = player
+        self.budget = budget_ms / 1000
+        self.max_nodes = max_nodes
+        self.shadow = game.shadow([0] * len(game.players))  # Копия без автоботов: ходы в ней делает только поиск
+        self.me = self.shadow.players[player.id]
+        self.baseline = AutoPlay(self.me, self.shadow.board)
+        self.recorder = MoveRecorder(self.shadow.board, self.me)  # Ходы плана планировщика, пока он играет в копии
+        self.nodes = 0
+        self.deadline = None
+        self.root_positions = ()
+        self.values = TranspositionTable(VALUE_CACHE_SIZE)
+
+    def out_of_budget(self):
+        if self.max_nodes is not None:
+            return self.nodes >= self.max_nodes
+        return time.perf_counter() >= self.deadline
+
+    # Оценка позиции
+
+    def progress(self, player):
+        """Продвижение роботов игрока: посылка в руках ценится, дальше - чем ближе к цели или к посылке, тем лучше"""
+        board = self.shadow.board
+        value = 0
+        empty = []
+        for robot in player.robots:
+            if robot.has_package:
+                target = board.target_cells.get(robot.package.number)
+                distance = board.distance(robot.pos, target) if target else None
+                value += CARRY_VALUE - (distance if distance is not None else CARRY_VALUE)
+            else:
+                empty.append(robot)
+        packages = list(board.available_packages.values())
+        if empty and packages:
+            assigned = allocate_packages(empty, packages, board)
+            for robot in empty:
+                package = assigned.get(robot)
+                distance = board.distance(robot.pos, pickup_cell(package)) if package else None
+                value -= distance if distance is not None else CARRY_VALUE
+        return value
+
+    def state_key(self):
+        return self.shadow.state_hash, tuple(player.score for player in self.shadow.players)
+
+    def evaluate(self):
+        key = self.state_key()
+        value = self.values.get(key)
+        if value is None:
+            value = self.score_position()
+            self.values.put(key, value)
+        return value
+
+    def score_position(self):
+        opponents = [player for player in self.shadow.players if player is not self.me]
+        value = DELIVERY_VALUE * self.me.score + self.progress(self.me)
+        if opponents:
+            value -= OPPONENT_WEIGHT * max(DELIVERY_VALUE * player.score + self.progress(player)
+                                           for player in opponents)
+        return value
+
+    # Поиск
+
+    def positions(self):
+        return tuple(robot.pos for robot in self.me.robots)
+
+    def children(self, node, seen):
+        """Все узлы на шаг глубже: любой робот, не сдавший посылку в этот ход, в любую допустимую сторону.
+        Позиции из seen (та же позиция другим порядком шагов) пропускаются"""
+        actions, snapshot, finished = node
+        shadow = self.shadow
+        board = shadow.board
+        result = []
+        robots = [robot for robot in self.me.robots if robot.index not in finished]
+        for robot, moves in board.legal_moves(robots).items():
+            for direction, _ in moves:
+                if self.out_of_budget():
+                    return result
+                had_package = robot.has_package
+                robot.move(direction, board)
+                self.nodes += 1
+                done = finished | {robot.index} if had_package and not robot.has_package else finished
+                key = (self.state_key(), done)
+                if key in seen:
+                    shadow.restore(snapshot)
+                    continue
+                seen.add(key)
+                # План, который возвращает роботов на исходные клетки, - это пропуск хода и путь к тупику
+                value = self.evaluate() if self.positions() != self.root_positions else float('-inf')
+                result.append((value, (actions + ((robot.index, direction),), shadow.snapshot(), done)))
+                shadow.restore(snapshot)
+        return result
+
+    def beam(self, root, width, depth, best):
+        """Один проход лучом ширины width. Возвращает (лучший узел, был ли перебор полным)"""
+        layer = [root]
+        complete = True
+        for _ in range(depth):
+            candidates = []
+            seen = set()
+            for node in layer:
+                self.shadow.restore(node[1])
+                candidates += self.children(node, seen)
+                if self.out_of_budget():
+                    break
+            if not candidates:
+                break
+            candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+            if candidates[0][0] > best[0]:
+                best = (candidates[0][0], candidates[0][1][0])
+            complete = complete and len(candidates) <= width
+            layer = [node for value, node in candidates[:width]]
+            if self.out_of_budget():
+                return best, False
+        return best, complete
+
+    def search(self):
+        """Лучший план хода: кортеж (номер робота, направление)"""
+        self.deadline = time.perf_counter() + self.budget
+        self.nodes = 0
+        depth = self.player.remaining_moves
+        with quiet():
+            self.shadow.restore(self.game.snapshot(), rng=False)
+            root_snapshot = self.shadow.snapshot()
+            root = ((), root_snapshot, frozenset())
+            self.root_positions = self.positions()
+
+            # Начальный кандидат - ход кооперативного планировщика
+            self.recorder.start()
+            self.baseline.play_cooperative()
+            best = (self.evaluate(), self.recorder.stop())
+            if not best[1]:
+                # Планировщик стоит на месте (роботы зажали друг друга): лучше любой допустимый шаг, чем тупик
+                best = (float('-inf'), ())
+
+            width = START_WIDTH
+            while not self.out_of_budget():
+                best, complete = self.beam(root, width, depth, best)
+                if complete:
+                    break
+                width *= 2
+        return best[1]
@@ -0,0 +1,109 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+
+# Двоичная карта: заголовок (магия, версия, размер), затем size * size байт цветов и size * size байт целей.
+# Загружается срезами из mmap, без разбора каждой клетки в Python
+MAP_HEADER = struct.Struct('<4sBI')
+MAP_MAGIC = b'ABMP'
+MAP_VERSION = 1
+MAP_SUFFIX = '.abm'
+MIN_SIZE = 7
+MAX_TARGETS = 255  # номер цели хранится в байте
+
+
+def target_slots(size):
+    """Клетки рамки под цели в порядке нумерации, как на стандартной карте:
+    левая сторона снизу вверх, верхняя слева направо, правая сверху вниз"""
+    rows = range(2, size - 2, 2)
+    left = [(0, y) for y in reversed(rows)]
+    top = [(x, 0) for x in range(2, size - 2, 2)]
+    right = [(size - 1, y) for y in rows]
+    return left + top + right
+
+
+def generate_grids(size, targets=9):
+    """Карта склада size x size в тех же обозначениях, что и csv_files: рамка 'g' с целями 'y' и углами 'b',
+    коридор 'g', белая зона расстановки посередине, снизу ряд выдачи 'a' над красными клетками 'r'.
+    Возвращает (коды цветов, номера целей) - по байту на клетку, построчно"""
+    if size < MIN_SIZE:
+        raise ValueError(f"Board size must be at least {MIN_SIZE}")
+    colors = bytearray(b'g' * (size * size))
+    numbers = bytearray(size * size)
+
+    # Белая зона: всё внутри коридора до ряда выдачи
+    white_row = b'g' * 2 + b'w' * (size - 4) + b'g' * 2
+    for y in range(2, size - 2):
+        colors[y * size:(y + 1) * size] = white_row
+
+    # Выдача: клетки 'a' через одну, под каждой красная клетка с посылкой
+    for x in range(2, size - 2, 2):
+        colors[(size - 2) * size + x] = ord('a')
+        colors[(size - 1) * size + x] = ord('r')
+
+    colors[0] = colors[size - 1] = ord('b')
+
+    slots = target_slots(size)
+    count = min(targets, len(slots), MAX_TARGETS)
+    for number in range(1, count + 1):
+        # Цели распределяются по рамке равномерно; при count == len(slots) заняты все места
+        x, y = slots[(number - 1) * len(slots) // count]
+        colors[y * size + x] = ord('y')
+        numbers[y * size + x] = number
+    return bytes(colors), bytes(numbers)
+
+
+def save_map(path, size, colors, targets):
+    with open(path, 'wb') as file:
+        file.write(MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, size))
+        file.write(colors)
+        file.write(targets)
+
+
+def load_map(path):
+    """Карта из двоичного файла: (size, цвета, цели)"""
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, size = MAP_HEADER.unpack_from(data)
+        if magic != MAP_MAGIC or version != MAP_VERSION:
+            raise ValueError(f"{path} is not a map of version {MAP_VERSION}")
+        cells = size * size
+        if len(data) != MAP_HEADER.size + 2 * cells:
+            raise ValueError(f"{path} is truncated")
+        start = MAP_HEADER.size
+        return size, data[start:start + cells], data[start + cells:start + 2 * cells]
+
+
+def save_csv(colors_path, targets_path, size, colors, targets):
+    """Та же карта в формате csv_files - для доски Board"""
+    with open(colors_path, 'w') as file:
+        for y in range(size):
+            file.write(','.join(chr(code) for code in colors[y * size:(y + 1) * size]) + '\n')
+    with open(targets_path, 'w') as file:
+        for y in range(size):
+            file.write(','.join(map(str, targets[y * size:(y + 1) * size])) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор карт склада произвольного размера")
+    parser.add_argument("size", type=int)
+    parser.add_argument("--targets", type=int, default=9, help="сколько целей (номеров посылок)")
+    parser.add_argument("--output", default=None, help=f"двоичная карта, по умолчанию maps/<size>{MAP_SUFFIX}")
+    parser.add_argument("--csv", nargs=2, metavar=("COLORS", "TARGETS"), help="ещё и в формате csv_files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    colors, targets = generate_grids(args.size, args.targets)
+    output = args.output or f"maps/{args.size}{MAP_SUFFIX}"
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    save_map(output, args.size, colors, targets)
+    if args.csv:
+        save_csv(args.csv[0], args.csv[1], args.size, colors, targets)
+    print(f"Map {args.size}x{args.size} with {max(targets)} targets saved to {output} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
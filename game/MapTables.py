@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+MAP_TABLES_SIZE = 8  # Для скольких разных карт держим таблицы в памяти процесса
+
+_shared = OrderedDict()  # Ключ карты -> MapTables
+_shared_lock = threading.Lock()
+
+
+class MapTables:
+    """Статичные таблицы одной карты: проходимость, соседи клеток и LRU-кэш полей расстояний.
+    Зависят только от цветов и целей, поэтому общие для всех досок с этой картой: партии пакетного прогона
+    в одном процессе, теневые копии поиска и планирования. Кэш полей читает и фоновый поток планирования,
+    поэтому он под блокировкой; сами поля после построения не меняются"""
+
+    def __init__(self, passable, neighbour_indexes, cache_size):
+        self.passable = passable
+        self.neighbour_indexes = neighbour_indexes
+        self.cache_size = cache_size
+        self.fields = OrderedDict()  # Клетка -> поле расстояний до неё
+        self.lock = threading.Lock()
+
+    def get(self, pos):
+        with self.lock:
+            field = self.fields.get(pos)
+            if field is not None:
+                self.fields.move_to_end(pos)
+            return field
+
+    def put(self, pos, field):
+        with self.lock:
+            self.fields[pos] = field
+            if len(self.fields) > self.cache_size:
+                self.fields.popitem(last=False)
+
+
+def shared_tables(key, build):
+    """Таблицы карты key: уже построенные в этом процессе или новые от build()"""
+    with _shared_lock:
+        tables = _shared.get(key)
+        if tables is not None:
+            _shared.move_to_end(key)
+            return tables
+    tables = build()
+    with _shared_lock:
+        tables = _shared.setdefault(key, tables)
+        if len(_shared) > MAP_TABLES_SIZE:
+            _shared.popitem(last=False)
+    return tables
+
+
+def clear_shared_tables():
+    """Забыть таблицы всех карт: например, чтобы замерить загрузку карты с нуля"""
+    with _shared_lock:
+        _shared.clear()
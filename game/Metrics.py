@@ -0,0 +1,154 @@
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST = "127.0.0.1"
+MAX_TURN_ROWS = 100000  # Сколько последних ходов держим для CSV; итоги партии и общие счётчики не ограничены
+PREFIX = "antbot_"
+
+# Что считается: имя -> описание для Prometheus
+COUNTERS = {
+    "bfs_nodes": "Cells expanded by AutoPlay.find_path BFS",
+    "planner_nodes": "States expanded by the cooperative A* planner",
+    "plan_cache_hits": "Turn plans reused from the transposition table",
+    "failed_moves": "Robot moves rejected by the board",
+    "deliveries": "Packages delivered to their target cells",
+    "turns": "Turns finished",
+    "games": "Games started",
+}
+SUMMARIES = {
+    "path_length": "Length of paths found by AutoPlay.find_path and the planner",
+    "play_seconds": "Time spent in AutoPlay.play per call",
+    "frame_seconds": "Time spent redrawing a frame in ScreenAnimator, frames without changes are not counted",
+}
+
+
+class Metrics:
+    """Счётчики и сводки (число, сумма, максимум) горячих путей. Обновление - пара операций со словарём,
+    поэтому метрики включены всегда. Общий экземпляр - METRICS, как корневой логгер"""
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.summaries = {name: [0, 0.0, 0.0] for name in SUMMARIES}
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def observe(self, name, value):
+        summary = self.summaries[name]
+        summary[0] += 1
+        summary[1] += value
+        if value > summary[2]:
+            summary[2] = value
+
+    def totals(self):
+        """Плоский словарь текущих значений: счётчики и <сводка>_count / _sum"""
+        values = dict(self.counters)
+        for name, (count, total, _) in list(self.summaries.items()):
+            values[f"{name}_count"] = count
+            values[f"{name}_sum"] = total
+        return values
+
+    def reset(self):
+        self.__init__()
+
+    def prometheus(self, recorder=None):
+        """Текстовый формат Prometheus; с recorder - ещё и значения последнего хода и текущей партии"""
+        lines = []
+        for name, value in dict(self.counters).items():
+            lines += [f"# HELP {PREFIX}{name}_total {COUNTERS[name]}", f"# TYPE {PREFIX}{name}_total counter",
+                      f"{PREFIX}{name}_total {value}"]
+        for name, (count, total, maximum) in list(self.summaries.items()):
+            lines += [f"# HELP {PREFIX}{name} {SUMMARIES[name]}", f"# TYPE {PREFIX}{name} summary",
+                      f"{PREFIX}{name}_count {count}", f"{PREFIX}{name}_sum {total:.9g}",
+                      f"{PREFIX}{name}_max {maximum:.9g}"]
+        if recorder is not None:
+            for scope, values in (("last_turn", recorder.last_turn), ("game", recorder.game_totals)):
+                lines.append(f"# TYPE {PREFIX}{scope} gauge")
+                for name, value in dict(values).items():
+                    lines.append(f'{PREFIX}{scope}{{metric="{name}"}} {value:.9g}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class MetricsRecorder:
+    """Наблюдатель доски: разбивает счётчики партии (по умолчанию общие METRICS) по ходам и партиям.
+    Строка хода - приращения счётчиков с конца предыдущего хода; новая партия - по state_restored"""
+
+    def __init__(self, game, metrics=None):
+        self.game = game
+        metrics = self.metrics = metrics if metrics is not None else game.board.metrics
+        self.rows = deque(maxlen=MAX_TURN_ROWS)
+        self.game_index = 1
+        self.turn_started = metrics.totals()
+        self.game_started = dict(self.turn_started)
+        self.last_turn = {}
+        self.game_totals = {}
+        metrics.count("games")
+        game.board.add_observer(self)
+
+    def delta(self, since):
+        return {name: value - since.get(name, 0) for name, value in self.metrics.totals().items()}
+
+    def on_package_dropped(self, robot, package):
+        self.metrics.count("deliveries")
+
+    def on_turn_ended(self, player):
+        self.metrics.count("turns")
+        self.last_turn = self.delta(self.turn_started)
+        self.game_totals = self.delta(self.game_started)
+        self.rows.append((self.game_index, self.game.turns + 1, player.id + 1, self.last_turn))
+        self.turn_started = self.metrics.totals()
+
+    def on_state_restored(self):
+        self.game_index += 1
+        self.metrics.count("games")
+        self.game_started = self.turn_started = self.metrics.totals()
+        self.game_totals = {}
+
+    def csv_lines(self):
+        """Метрики по ходам: партия, ход, игрок и приращения счётчиков за ход"""
+        names = list(self.metrics.totals())
+        yield "game,turn,player," + ",".join(names) + "\n"
+        for game_index, turn, player, values in list(self.rows):
+            yield f"{game_index},{turn},{player}," + ",".join(f"{values.get(name, 0):.9g}" for name in names) + "\n"
+
+    def save_csv(self, path):
+        with open(path, "w") as file:
+            file.writelines(self.csv_lines())
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """GET /metrics - Prometheus, GET /metrics.csv - метрики по ходам"""
+    metrics = METRICS
+    recorder = None
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = self.metrics.prometheus(self.recorder).encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.csv" and self.recorder is not None:
+            body = "".join(self.recorder.csv_lines()).encode()
+            content_type = "text/csv"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Каждый опрос в лог не пишем
+
+
+def serve_metrics(port, recorder=None, host=METRICS_HOST, metrics=METRICS):
+    """Локальная точка опроса метрик в фоновом потоке. Возвращает сервер (server.shutdown() - остановить)"""
+    handler = type("Handler", (MetricsHandler,), {"metrics": metrics, "recorder": recorder})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
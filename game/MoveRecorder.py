@@ -0,0 +1,24 @@
+from game.consts import DIRECTION_BY_DELTA
+
+
+class MoveRecorder:
+    """Запись шагов хода на копии партии: наблюдатель её доски, шаги - (номер робота, направление).
+    player - записывать только его роботов, None - всех"""
+
+    def __init__(self, board, player=None):
+        self.player = player
+        self.moves = None  # Пока None, шаги не пишутся
+        board.add_observer(self)
+
+    def start(self):
+        self.moves = []
+
+    def stop(self):
+        """Закончить запись и вернуть шаги"""
+        moves, self.moves = tuple(self.moves), None
+        return moves
+
+    def on_robot_moved(self, robot, old_pos):
+        if self.moves is not None and (self.player is None or robot.player is self.player):
+            delta = (robot.pos[0] - old_pos[0], robot.pos[1] - old_pos[1])
+            self.moves.append((robot.index, DIRECTION_BY_DELTA[delta]))
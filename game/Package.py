@@ -2,9 +2,9 @@ import random
 
 
 class Package:
-    def __init__(self, pos):
+    def __init__(self, pos, number=None):
         self.pos = pos
-        self.number = random.randint(1, 9)  # Generate a random number
+        self.number = random.randint(1, 9) if number is None else number  # Generate a random number
         self.picked_up = False
         self.visible = True
 
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from game.Logs import quiet
+from game.MoveRecorder import MoveRecorder
+
+
+class PlanWorker:
+    """Планирование ходов автоботов в фоновом потоке, чтобы окно не замирало, пока думает планировщик.
+    Поток играет на своей копии партии из снимка живой и возвращает шаги хода (номер робота, направление),
+    а главный цикл применяет их к живой доске через AutoPlay.play_moves. Пока анимируется ход, поток уже считает
+    ходы следующих автоботов подряд. План лежит по снимку позиции, для которой он посчитан, и берётся, только если
+    живая партия пришла ровно в эту позицию: генератор случайных чисел в снимке тоже, так что новые посылки в копии
+    те же, что будут на живой доске"""
+
+    def __init__(self, game, on_ready=None):
+        self.game = game
+        self.on_ready = on_ready  # Вызывается из потока планирования, когда план готов: разбудить главный цикл
+        self.shadow = game.shadow([int(game.get_auto_play(player) is not None) for player in game.players])
+        for auto_play in game.auto_play:
+            self.shadow.get_auto_play(self.shadow.players[auto_play.player.id]).cooperative = auto_play.cooperative
+        self.recorder = MoveRecorder(self.shadow.board)  # Шаги хода, пока автобот играет в копии
+        # Один поток: копия партии одна, а ходы всё равно считаются по очереди
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='planner')
+        self.plans = {}  # Снимок позиции -> шаги хода автобота, который в ней ходит
+        self.pending = None
+
+    def plan(self, snapshot, end_turn):
+        """В потоке планирования: ходы автоботов подряд с позиции snapshot, пока не дойдёт очередь человека
+        или кто-то не выиграет, но не больше круга. end_turn - сначала закончить ход в snapshot.
+        Возвращает {снимок позиции: шаги хода}"""
+        shadow = self.shadow
+        plans = {}
+        with quiet():  # Ходы копии в логе не нужны: живая партия запишет их сама
+            shadow.restore(snapshot)
+            for _ in shadow.players:
+                if end_turn:
+                    shadow.end_turn()
+                    if shadow.winner:
+                        break
+                auto_play = shadow.get_auto_play(shadow.current_player)
+                if auto_play is None:
+                    break
+                position = shadow.snapshot()
+                self.recorder.start()
+                auto_play.play()
+                plans[position] = self.recorder.stop()
+                end_turn = True
+        return plans
+
+    def submit(self, snapshot, end_turn):
+        self.pending = self.executor.submit(self.plan, snapshot, end_turn)
+        if self.on_ready:
+            self.pending.add_done_callback(lambda future: self.on_ready())
+
+    def collect(self):
+        """Забрать результат потока, если он готов. Ошибка планирования поднимается здесь, в главном потоке"""
+        if self.pending is not None and self.pending.done():
+            future, self.pending = self.pending, None
+            self.plans = future.result()
+
+    def ready(self):
+        """Есть ли план для текущей позиции живой партии. Если нет и поток свободен - начать его считать"""
+        self.collect()
+        snapshot = self.game.snapshot()
+        if snapshot in self.plans:
+            return True
+        if self.pending is None:
+            self.submit(snapshot, end_turn=False)
+        return False
+
+    def prefetch(self):
+        """После хода автобота, пока он анимируется: посчитать ходы следующих автоботов"""
+        self.collect()
+        if self.pending is None and not self.plans:
+            self.submit(self.game.snapshot(), end_turn=True)
+
+    def take(self):
+        """Шаги хода для текущей позиции живой партии; None - плана нет"""
+        self.collect()
+        return self.plans.pop(self.game.snapshot(), None)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,155 @@
+import heapq
+from game.Zobrist import TranspositionTable
+from game.consts import DIRECTIONS
+
+PLAN_CACHE_SIZE = 4096  # Сколько планов хода помним по хэшу позиции
+
+
+class ReservationTable:
+    """Таблица резервирования клеток во времени: (клетка, шаг) -> робот.
+    Робот, закончивший путь, занимает последнюю клетку до конца хода"""
+
+    def __init__(self):
+        self.slots = {}
+        self.resting = {}
+        self.last_use = {}
+
+    def clear(self):
+        self.slots.clear()
+        self.resting.clear()
+        self.last_use.clear()
+
+    def is_free(self, pos, t, robot):
+        owner = self.slots.get((pos, t))
+        if owner is not None and owner is not robot:
+            return False
+        rest = self.resting.get(pos)
+        return rest is None or rest[1] is robot or rest[0] > t
+
+    def can_enter(self, pos, t, robot):
+        # Клетка должна быть свободна и на предыдущем шаге: тогда план исполним при любом порядке роботов внутри шага
+        return self.is_free(pos, t, robot) and self.is_free(pos, t - 1, robot)
+
+    def can_rest(self, pos, t, robot):
+        return self.is_free(pos, t, robot) and self.last_use.get(pos, -1) < t
+
+    def reserve(self, robot, path, start_t=0):
+        """Резервирует путь (список клеток начиная с текущей) и стоянку в его конце"""
+        for i, pos in enumerate(path):
+            self.slots[(pos, start_t + i)] = robot
+            self.last_use[pos] = max(self.last_use.get(pos, -1), start_t + i)
+        self.resting[path[-1]] = (start_t + len(path) - 1, robot)
+
+
+class CooperativePlanner:
+    """Кооперативный A* по (клетка, шаг): роботы планируются по очереди и обходят резервы друг друга"""
+
+    def __init__(self, board, table=None):
+        self.board = board
+        self.table = table if table is not None else ReservationTable()
+        self.expanded = 0
+        # План - функция позиции, целей и лимитов: одинаковые позиции повторяются (подбор на тех же клетках выдачи)
+        self.plans = TranspositionTable(PLAN_CACHE_SIZE)
+
+    def is_walkable(self, pos, goal):
+        x, y = pos
+        if not (0 <= x < self.board.size and 0 <= y < self.board.size):
+            return False
+        return pos == goal or self.board.passable[y * self.board.size + x]
+
+    def find_path(self, robot, goal, horizon, start_t=0):
+        """Путь робота к goal длиной не больше horizon шагов. Список (direction, pos), None в direction - ожидание.
+        Если цель за горизонтом, возвращается частичный путь к клетке, ближайшей к цели"""
+        start = robot.pos
+        if start == goal:
+            return []
+        start_h = self.board.distance(start, goal)
+        if start_h is None:
+            return None
+        field = self.board.distance_field(goal)
+        size = self.board.size
+
+        def heuristic(pos):
+            dist = field[pos[1] * size + pos[0]]
+            return dist if dist >= 0 else 0
+        heap = [(start_h, start_h, start_t, start)]
+        parent = {(start, start_t): None}
+        best = (start_h, start_t, start)
+        closed = set()
+        expanded = 0
+        while heap:
+            f, h, t, pos = heapq.heappop(heap)
+            if (pos, t) in closed:
+                continue
+            closed.add((pos, t))
+            expanded += 1
+            if (h, t) < best[:2]:
+                best = (h, t, pos)
+            if pos == goal and self.table.can_rest(pos, t, robot):
+                best = (h, t, pos)
+                break
+            if t - start_t >= horizon:
+                continue
+            for direction, (dx, dy) in list(DIRECTIONS.items()) + [(None, (0, 0))]:
+                new_pos = (pos[0] + dx, pos[1] + dy)
+                state = (new_pos, t + 1)
+                if state in parent or not self.is_walkable(new_pos, goal):
+                    continue
+                if not self.table.can_enter(new_pos, t + 1, robot):
+                    continue
+                parent[state] = (pos, t, direction)
+                new_h = heuristic(new_pos)
+                heapq.heappush(heap, (t + 1 - start_t + new_h, new_h, t + 1, new_pos))
+
+        path = []
+        state = (best[2], best[1])
+        while parent[state] is not None:
+            prev_pos, prev_t, direction = parent[state]
+            path.append((direction, state[0]))
+            state = (prev_pos, prev_t)
+        path.reverse()
+        # Ожидания в конце пути ничего не дают
+        while path and path[-1][0] is None:
+            path.pop()
+        self.expanded += expanded
+        self.board.metrics.count('planner_nodes', expanded)
+        self.board.metrics.observe('path_length', len(path))
+        return path
+
+    def plan_turn(self, robots_goals, budgets, static_robots=(), slack=2):
+        """План хода для группы роботов за один проход.
+        robots_goals - список (robot, goal), budgets - лимит ходов каждого робота,
+        static_robots - роботы, которые в этот ход не двигаются (например, чужие)"""
+        # В ключе - номера роботов, а не объекты: после сброса партии роботы могут быть новыми
+        key = (self.board.robots_hash, tuple((robot.player.id, robot.index, goal, budgets[robot]) for robot, goal in robots_goals),
+               tuple((robot.player.id, robot.index) for robot in static_robots), slack)
+        cached = self.plans.get(key)
+        if cached is not None:
+            self.board.metrics.count('plan_cache_hits')
+            return {robot: path for (robot, goal), path in zip(robots_goals, cached)}
+
+        self.table.clear()
+        for robot in static_robots:
+            self.table.reserve(robot, [robot.pos])
+        # Пока робот не спланирован, он стоит на месте
+        for robot, goal in robots_goals:
+            self.table.reserve(robot, [robot.pos])
+
+        plans = {}
+        for robot, goal in robots_goals:
+            budget = budgets[robot]
+            del self.table.resting[robot.pos]
+            path = self.find_path(robot, goal, budget + slack) if goal and budget > 0 else None
+            path = path or []
+            # Обрезаем план по лимиту ходов: ожидания ходов не тратят
+            moves = 0
+            for i, (direction, pos) in enumerate(path):
+                if direction is not None:
+                    moves += 1
+                if moves > budget:
+                    path = path[:i]
+                    break
+            self.table.reserve(robot, [robot.pos] + [pos for direction, pos in path])
+            plans[robot] = path
+        self.plans.put(key, tuple(plans[robot] for robot, goal in robots_goals))
+        return plans
@@ -1,20 +1,46 @@
-import pygame
 import logging
 from game.Robot import Robot
 
 
 class Player:
-    def __init__(self, color):
-        self.id = color
+    def __init__(self, color, num_robots=1, idx=0, move_limit_per_turn=1, game_manager=None):
+        self.color = color
+        self.id = idx
+        self.idx = idx
+        self.num_robots = num_robots
+        self.move_limit_per_turn = move_limit_per_turn
+        self.remaining_moves = move_limit_per_turn
+        self.game_manager = game_manager
         self.robots = []
         self.score = 0
 
     def add_robot(self, robot):
         self.robots.append(robot)
 
-    def draw_robots(self, screen):
-        for robot in self.robots:
-            robot.RobotAnimator(screen)
+    def place_robot(self, pos, board, index):
+        """Установка робота: только на свободную белую клетку и не больше num_robots"""
+        if len(self.robots) >= self.num_robots:
+            return False
+        x, y = pos
+        if board.cells[y][x].color != 'w' or board.is_occupied(pos):
+            return False
+        robot = Robot(pos, index, self)
+        self.add_robot(robot)
+        board.occupied(pos, robot)
+        board.notify('robot_placed', robot)
+        return True
+
+    def move_robot(self, index, direction, board):
+        """Ручной ход: тратит один ход из лимита, если робот сдвинулся"""
+        if self.remaining_moves <= 0 or index >= len(self.robots):
+            return False
+        if self.robots[index].move(direction, board):
+            self.remaining_moves -= 1
+            return True
+        return False
+
+    def reset_moves(self):
+        self.remaining_moves = self.move_limit_per_turn
 
     def increase_score(self, points):
         self.score += points
@@ -22,9 +48,3 @@ class Player:
 
     def win(self):
         logging.info(f"Player {self.id + 1} reached the winning score. Resetting the game.")
-
-    def draw_score(self, screen, position):
-        font = pygame.font.SysFont(None, 36)
-        score_text = f"({self.id + 1}) Player: {self.score} points"
-        img = font.render(score_text, True, (0, 0, 0))
-        screen.blit(img, position)
@@ -1,18 +1,14 @@
-import pygame
 import logging
-from game.consts import DEFAULT_IMAGE_SIZE
 import time
-
-
-def index_to_letter(index):
-    return chr(ord('A') + index)
+from game.Commands import parse_position
+from game.consts import index_to_letter
 
 
 class PlayerSimulator:
-    def __init__(self, players, board, screen, game_manager):
+    def __init__(self, players, board, renderer=None):
         self.players = players
         self.board = board
-        self.screen = screen
+        self.renderer = renderer  # Отрисовка необязательна: без неё симуляция идёт без pygame
         self.current_player = 0
         self.current_robot_index = 0
         self.current_robot_counts = [0] * len(players)
@@ -23,18 +19,16 @@ class PlayerSimulator:
 
     def place_initial_packages(self):
         """Начальный этап: Размещение начальных посылок на доске"""
-        red_cells = self.board.get_cells_by_color('r')
-        for i, cell in enumerate(red_cells):
+        for cell in self.board.red_cells:
             package = self.board.place_package((cell.x, cell.y))
             package.visible = False
 
     def update_package_visibility(self, placing_phase):
         """Обновление видимости: Обновление видимости пакетов в зависимости от фазы размещения"""
         self.placing_phase = placing_phase
-        for row in self.board.cells:
-            for cell in row:
-                if cell.package:
-                    cell.package.visible = not placing_phase
+        for package in self.board.available_packages.values():
+            package.visible = not placing_phase
+        self.board.notify('package_visibility_changed')
 
     def place_robot_at_position(self, cell_x, cell_y):
         """Размещение робота: Размещение робота на доске, функция - в которой сейчас проблемы. Я не знаю,
@@ -55,18 +49,17 @@ class PlayerSimulator:
                     self.update_package_visibility(self.placing_phase)
                     return True
                 self.current_player = (self.current_player + 1) % len(self.players)
-                time.sleep(0.2)  # Задержка в одну секунду
         return False
 
     def execute_put_bot(self, player_index, pos):
         """Установка бота для второго режима, его можно не трогать, я его по приколу сделала, потому что
          научник попросил. Я спорить с ним боюсь"""
-        row = int(pos[1]) - 1
-        col = ord(pos[0].lower()) - ord('a')
+        col, row = parse_position(pos)
+        if not (0 <= col < self.board.size and 0 <= row < self.board.size):
+            logging.warning(f"Position {pos} is out of the board.")
+            return False
         if self.players[player_index].place_robot((col, row), self.board, len(self.players[player_index].robots)):
             logging.info(f"Player {player_index + 1} placed robot at ({pos}).")
-            self.ScreenAnimator()
-            pygame.time.delay(50)
 
     def StartTurn(self, player_index, move_steps):
         """Начало хода для второго игрока"""
@@ -97,30 +90,22 @@ class PlayerSimulator:
                 direction = "up"
 
             if direction and robot.move(direction, self.board):
-                self.ScreenAnimator()
-                pygame.display.flip()
-                pygame.time.delay(30)
+                self.players[player_index].remaining_moves -= 1
 
             if self.players[player_index].remaining_moves <= 0:
                 self.switch_to_next_player()
                 break
 
-    def PressedKey(self, event):
-        """Нажатие клавиши, обработка чисто нажатий клавиш"""
-        if event.key == pygame.K_TAB:
+    def PressedKey(self, key):
+        """Нажатие клавиши, обработка чисто нажатий клавиш ('tab', '1'-'4', 'up', 'down', 'left', 'right')"""
+        if key == 'tab':
             self.switch_to_next_player()
-        elif event.key in [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]:
-            robot_num = event.key - pygame.K_1
+        elif key in ('1', '2', '3', '4'):
+            robot_num = int(key) - 1
             if robot_num < len(self.players[self.current_player].robots):
                 self.current_robot_index = robot_num
-        elif event.key == pygame.K_UP:
-            self.players[self.current_player].move_robot(self.current_robot_index, 'up', self.board)
-        elif event.key == pygame.K_DOWN:
-            self.players[self.current_player].move_robot(self.current_robot_index, 'down', self.board)
-        elif event.key == pygame.K_LEFT:
-            self.players[self.current_player].move_robot(self.current_robot_index, 'left', self.board)
-        elif event.key == pygame.K_RIGHT:
-            self.players[self.current_player].move_robot(self.current_robot_index, 'right', self.board)
+        elif key in ('up', 'down', 'left', 'right'):
+            self.players[self.current_player].move_robot(self.current_robot_index, key, self.board)
         if self.players[self.current_player].remaining_moves <= 0:
             self.switch_to_next_player()
 
@@ -132,23 +117,12 @@ class PlayerSimulator:
         logging.info(f"Switched to player {self.current_player + 1}.")
 
     def ScreenAnimator(self):
-        """Анимация экрана"""
-        self.screen.fill((255, 255, 255))
-
-        for i in range(self.board.size):
-            for j in range(self.board.size):
-                self.board[i][j].display_cell(self.screen)
-
-        for player in self.players:
-            player.draw_robots(self.screen)
-
-        score_y_offset = DEFAULT_IMAGE_SIZE[0] // 8
-        for i, player in enumerate(self.players):
-            position = (self.board.size * DEFAULT_IMAGE_SIZE[0] * 1.25, score_y_offset + i * 40)
-            player.draw_score(self.screen, position)
-        pygame.display.update()
+        """Анимация экрана: делегируется отрисовщику, если он подключён. Время кадра пишется, только если
+        экран действительно перерисован: пустые кадры без изменений занижали бы метрику"""
+        if self.renderer:
+            started = time.perf_counter()
+            if self.renderer.draw():
+                self.board.metrics.observe('frame_seconds', time.perf_counter() - started)
 
     def parse_position(self, pos_str):
-        column = ord(pos_str[0].lower()) - ord('a')
-        row = int(pos_str[1]) - 1
-        return column, row
+        return parse_position(pos_str)
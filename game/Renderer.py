@@ -0,0 +1,225 @@
+import pygame
+from game.Animator import Animator
+from game.AssetCache import assets as shared_assets
+from game.Cell import Cell
+from game.consts import DEFAULT_IMAGE_SIZE
+
+BACKGROUND = (255, 255, 255)
+
+
+class Renderer:
+    """Отрисовка доски через pygame. Подписывается на события доски и в симуляции не участвует.
+    Статичная часть доски (цвета, сетка, номера целей) рисуется один раз во внеэкранную поверхность,
+    на каждом кадре перерисовываются только изменившиеся области"""
+    image_paths = {
+        0: 'images/blue_robot.png',     # blue
+        1: 'images/red_robot.png',      # red
+        2: 'images/green_robot.png',    # green
+        3: 'images/orange_robot.png'    # orange
+    }
+
+    def __init__(self, screen, board, players, assets=None, turbo=False):
+        self.screen = screen
+        self.board = board
+        self.players = players
+        self.assets = assets if assets is not None else shared_assets
+        self.animator = Animator(self, turbo=turbo)
+        self.robot_rects = {}
+        self.static_layer = None
+        self.dirty_rects = []
+        self.full_redraw = True
+        board.add_observer(self)
+
+    def robot_rect(self, robot):
+        if robot not in self.robot_rects:
+            self.robot_rects[robot] = pygame.Rect((robot.pos[0] + 1) * DEFAULT_IMAGE_SIZE[0],
+                                                  (robot.pos[1] + 1) * DEFAULT_IMAGE_SIZE[1],
+                                                  DEFAULT_IMAGE_SIZE[0], DEFAULT_IMAGE_SIZE[1])
+        return self.robot_rects[robot]
+
+    def robot_image(self, robot):
+        return self.assets.scaled(Renderer.image_paths[robot.player.id], DEFAULT_IMAGE_SIZE)
+
+    def invalidate(self, rect=None):
+        """Пометить область (или весь экран) для перерисовки на следующем кадре"""
+        if rect is None:
+            self.full_redraw = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    @property
+    def dirty(self):
+        """Есть что перерисовать: незавершённые анимации или помеченные области"""
+        return self.full_redraw or bool(self.dirty_rects) or self.animator.busy
+
+    # Области, которые занимают динамические элементы
+
+    def package_image(self, size):
+        return self.assets.scaled('images/package.png', (DEFAULT_IMAGE_SIZE[0] * size, DEFAULT_IMAGE_SIZE[1] * size))
+
+    def package_bounds(self, pos):
+        package_image = self.package_image(2)
+        return pygame.Rect((pos[0] + 1) * DEFAULT_IMAGE_SIZE[0] + (DEFAULT_IMAGE_SIZE[0] - package_image.get_width()) / 2,
+                           (pos[1] + 2) * DEFAULT_IMAGE_SIZE[1] - package_image.get_height() / 2,
+                           package_image.get_width(), package_image.get_height())
+
+    def carried_package_pos(self, rect):
+        package_image = self.package_image(1.3)
+        return (rect.x + rect.width // 2 - package_image.get_width() // 2,
+                rect.y - rect.height // 2 + DEFAULT_IMAGE_SIZE[0] * 0.38)
+
+    def robot_bounds(self, robot):
+        rect = self.robot_rect(robot)
+        if not robot.package:
+            return rect.copy()
+        package_image = self.package_image(1.3)
+        # Номер посылки рисуется чуть выше картинки, поэтому берём запас сверху
+        return rect.union(pygame.Rect(self.carried_package_pos(rect), package_image.get_size()).inflate(0, 32))
+
+    def score_position(self, i):
+        return self.board.size * DEFAULT_IMAGE_SIZE[0] * 1.25, DEFAULT_IMAGE_SIZE[0] // 8 + i * 40
+
+    def score_bounds(self, i):
+        x, y = self.score_position(i)
+        return pygame.Rect(x, y, self.screen.get_width() - x, 40)
+
+    # События доски
+
+    def on_robot_placed(self, robot):
+        self.invalidate(self.robot_bounds(robot))
+        self.draw()
+
+    def on_robot_moved(self, robot, old_pos):
+        """Перемещение робота: анимация ставится в очередь и проигрывается по кадрам в draw()"""
+        self.animator.add_move(robot, robot.pos)
+
+    def on_package_placed(self, package):
+        self.invalidate(self.package_bounds(package.pos))
+
+    def on_package_picked(self, robot, package):
+        self.invalidate(self.package_bounds(package.pos))
+        self.invalidate(self.robot_bounds(robot))
+
+    def on_package_dropped(self, robot, package):
+        # Посылки у робота уже нет: стираем область, где она была нарисована
+        self.invalidate(self.robot_rect(robot).inflate(DEFAULT_IMAGE_SIZE[0], DEFAULT_IMAGE_SIZE[1] * 2))
+        for i in range(len(self.players)):
+            self.invalidate(self.score_bounds(i))
+
+    def on_package_visibility_changed(self):
+        self.invalidate()
+
+    def on_state_restored(self):
+        """Состояние восстановлено из снимка: анимации обрываются, спрайты встают на клетки роботов"""
+        self.animator.queues.clear()
+        self.animator.active.clear()
+        self.robot_rects.clear()
+        self.invalidate()
+
+    # Отрисовка
+
+    def build_static_layer(self):
+        self.static_layer = pygame.Surface(self.screen.get_size())
+        self.static_layer.fill(BACKGROUND)
+        for i in range(self.board.size):
+            for j in range(self.board.size):
+                self.draw_cell(self.static_layer, self.board[i][j])
+        if pygame.display.get_surface() is not None:
+            self.static_layer = self.static_layer.convert()
+
+    def draw(self):
+        """Анимация экрана: весь экран при первом кадре, дальше - только изменившиеся области.
+        Возвращает, был ли кадр перерисован"""
+        if self.static_layer is None:
+            self.build_static_layer()
+        self.animator.update(pygame.time.get_ticks())
+
+        if self.full_redraw:
+            self.full_redraw = False
+            self.dirty_rects.clear()
+            self.screen.blit(self.static_layer, (0, 0))
+            self.draw_dynamic(self.screen.get_rect())
+            pygame.display.update()
+            return True
+
+        if not self.dirty_rects:
+            return False
+        screen_rect = self.screen.get_rect()
+        rects = [rect.clip(screen_rect) for rect in self.dirty_rects]
+        self.dirty_rects = []
+        for rect in rects:
+            self.screen.set_clip(rect)
+            self.screen.blit(self.static_layer, rect, rect)
+            self.draw_dynamic(rect)
+        self.screen.set_clip(None)
+        pygame.display.update(rects)
+        return True
+
+    def draw_dynamic(self, area):
+        """Посылки, роботы и счёт, попадающие в область area"""
+        for pos, package in self.board.available_packages.items():
+            if package.visible and area.colliderect(self.package_bounds(pos)):
+                self.draw_package(pos, package)
+
+        for player in self.players:
+            for robot in player.robots:
+                if area.colliderect(self.robot_bounds(robot)):
+                    self.draw_robot(robot)
+
+        for i, player in enumerate(self.players):
+            if area.colliderect(self.score_bounds(i)):
+                self.draw_score(player, self.score_position(i))
+
+    def draw_cell(self, surface, cell):
+        pygame.draw.rect(surface, Cell.colors[cell.color],
+                         ((cell.x + 1) * DEFAULT_IMAGE_SIZE[0],
+                          (cell.y + 1) * DEFAULT_IMAGE_SIZE[1],
+                          DEFAULT_IMAGE_SIZE[0],
+                          DEFAULT_IMAGE_SIZE[1]))
+
+        pygame.draw.rect(surface, (0, 0, 0),
+                         ((cell.x + 1) * DEFAULT_IMAGE_SIZE[0],
+                          (cell.y + 1) * DEFAULT_IMAGE_SIZE[1],
+                          DEFAULT_IMAGE_SIZE[0],
+                          DEFAULT_IMAGE_SIZE[1]), 1)
+
+        if cell.target:
+            img = self.assets.glyph(str(cell.target), 64)
+            surface.blit(img, ((cell.x + 1) * DEFAULT_IMAGE_SIZE[0] + (DEFAULT_IMAGE_SIZE[0] - img.get_width()) / 2,
+                               (cell.y + 1) * DEFAULT_IMAGE_SIZE[1] + (DEFAULT_IMAGE_SIZE[1] - img.get_height()) / 2))
+
+    def draw_package(self, pos, package):
+        package_image = self.package_image(2)
+        package_rect = self.package_bounds(pos)
+        self.screen.blit(package_image, package_rect)
+
+        number_img = self.assets.glyph(str(package.number), 48)
+        number_pos = (
+            package_rect.x + package_image.get_width() / 2 - number_img.get_width() / 2,
+            package_rect.y + package_image.get_height() / 2 - number_img.get_height() / 2 - 40
+        )
+        self.screen.blit(number_img, number_pos)
+
+    def draw_robot(self, robot):
+        rect = self.robot_rect(robot)
+        self.screen.blit(self.robot_image(robot), rect)
+        number_img = self.assets.glyph(str(robot.index), 32)
+        number_pos = (
+            rect.x + rect.width // 2 - number_img.get_width() // 2,
+            rect.y + rect.height // 2 - number_img.get_height() // 2
+        )
+        self.screen.blit(number_img, number_pos)
+        if robot.package:
+            package_image = self.package_image(1.3)
+            package_pos = self.carried_package_pos(rect)
+            self.screen.blit(package_image, package_pos)
+            number_img = self.assets.glyph(str(robot.package.number), 48)
+            number_pos = (
+                package_pos[0] + package_image.get_width() // 2 - number_img.get_width() // 2,
+                package_pos[1] + package_image.get_height() // 2 - number_img.get_height() * 1.4  # Смещение выше
+            )
+            self.screen.blit(number_img, number_pos)
+
+    def draw_score(self, player, position):
+        img = self.assets.glyph(f"({player.id + 1}) Player: {player.score} points", 36)
+        self.screen.blit(img, position)
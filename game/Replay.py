@@ -0,0 +1,399 @@
+import argparse
+import logging
+import struct
+import time
+from game.Board import Board
+from game.CompactBoard import CompactBoard
+from game.Package import Package
+from game.Robot import Robot
+from game.Zobrist import carry_key, package_key, robot_key, turn_key
+from game.consts import DIRECTION_BY_DELTA, DIRECTIONS, WALKABLE_COLORS
+
+# Двоичный журнал партии: заголовок, затем записи по 8 байт.
+# Заголовок: магия, версия, seed партии, размер доски, игроков, роботов на игрока, ходов за ход, очков для победы
+HEADER = struct.Struct('<4sBQHBBBB')
+MAGIC = b'ABRP'
+VERSION = 2
+# Запись: вид, игрок, робот, значение (направление / номер посылки), x, y
+RECORD = struct.Struct('<BBBBHH')
+
+PLACE = 1    # робот поставлен на свободную белую клетку (x, y)
+MOVE = 2     # робот сходил в направлении value и оказался на (x, y)
+PICK = 3     # робот подобрал посылку value с красной клетки (x, y)
+DROP = 4     # робот сдал посылку на цели (x, y), игроку +1 очко
+PACKAGE = 5  # на красную клетку (x, y) легла посылка value
+TURN = 6     # игрок закончил ход
+RESET = 7    # состояние восстановлено из снимка: дальше идёт его полное описание
+SCORE = 8    # очки игрока равны x (только после RESET)
+CARRY = 9    # робот несёт посылку value, взятую с (x, y) (только после RESET)
+ROBOT = 10   # робот стоит на (x, y) (только в описании состояния: после RESET и в начале журнала)
+CELL_KINDS = frozenset((PLACE, MOVE, PICK, DROP, PACKAGE, ROBOT))  # записи, где (x, y) - клетка доски
+
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+DIRECTION_DELTAS = list(DIRECTIONS.values())
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayRecorder:
+    """Запись партии: наблюдатель доски, на каждое событие - одна запись в буфер"""
+
+    def __init__(self, game):
+        self.game = game
+        config = game.config
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, game.seed, game.board.size, len(game.players),
+                                          config.robots_per_player, config.move_limit_per_turn, config.win_score))
+        game.board.add_observer(self)
+        self.write_state()
+
+    def write(self, kind, player=0, robot=0, value=0, pos=(0, 0)):
+        self.data += RECORD.pack(kind, player, robot, value, pos[0], pos[1])
+
+    def write_state(self):
+        """Полное описание текущего состояния: роботы, их груз, посылки на доске, очки"""
+        for player in self.game.players:
+            for robot in player.robots:
+                self.write(ROBOT, player.id, robot.index, 0, robot.pos)
+                if robot.package:
+                    self.write(CARRY, player.id, robot.index, robot.package.number, robot.package.pos)
+            if player.score:
+                self.write(SCORE, player.id, 0, 0, (player.score, 0))
+        for pos, package in self.game.board.available_packages.items():
+            self.write(PACKAGE, 0, 0, package.number, pos)
+
+    def on_robot_placed(self, robot):
+        self.write(PLACE, robot.player.id, robot.index, 0, robot.pos)
+
+    def on_robot_moved(self, robot, old_pos):
+        delta = (robot.pos[0] - old_pos[0], robot.pos[1] - old_pos[1])
+        self.write(MOVE, robot.player.id, robot.index, DIRECTION_CODES[DIRECTION_BY_DELTA[delta]], robot.pos)
+
+    def on_package_picked(self, robot, package):
+        self.write(PICK, robot.player.id, robot.index, package.number, package.pos)
+
+    def on_package_dropped(self, robot, package):
+        self.write(DROP, robot.player.id, robot.index, 0, robot.pos)
+
+    def on_package_placed(self, package):
+        self.write(PACKAGE, 0, 0, package.number, package.pos)
+
+    def on_turn_ended(self, player):
+        self.write(TURN, player.id)
+
+    def on_state_restored(self):
+        self.write(RESET)
+        self.write_state()
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.data)
+
+
+def read_header(data):
+    if len(data) < HEADER.size:
+        raise ReplayError("Replay is too short")
+    magic, version, seed, size, players, robots, moves, win_score = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ReplayError(f"Not a replay of version {VERSION}")
+    if (len(data) - HEADER.size) % RECORD.size:
+        raise ReplayError("Replay ends with a partial record")
+    return dict(seed=seed, size=size, players=players, robots=robots, moves=moves, win_score=win_score)
+
+
+class Replayer:
+    """Быстрое воспроизведение журнала без pygame и без объектов игры: состояние - плоские массивы по клеткам.
+    Каждая запись проверяется по правилам (соседняя клетка, проходимость, занятость, цели, подбор и сдача)"""
+
+    def __init__(self, board, data):
+        self.board = board
+        self.data = data
+        self.header = read_header(data)
+        if self.header['size'] != board.size:
+            raise ReplayError(f"Replay is for a {self.header['size']}x{self.header['size']} board")
+        size = board.size
+        self.walkable = bytearray(size * size)
+        self.white = bytearray(size * size)  # Белые клетки: только на них ставят роботов
+        self.pickup = bytearray(size * size)  # 1 - клетка 'a' над красной: отсюда берут посылки
+        self.targets = bytearray(size * size)
+        for row in board.cells:
+            for cell in row:
+                idx = cell.y * size + cell.x
+                self.walkable[idx] = cell.color in WALKABLE_COLORS
+                self.white[idx] = cell.color == 'w'
+                self.targets[idx] = cell.target or 0
+                if cell.color == 'a' and cell.y + 1 < size and board.cells[cell.y + 1][cell.x].color == 'r':
+                    self.pickup[idx] = 1
+        self.reset()
+
+    def reset(self):
+        players = self.header['players']
+        self.robots = [{} for _ in range(players)]   # игрок -> {робот: индекс клетки}
+        self.cargo = [{} for _ in range(players)]    # игрок -> {робот: номер посылки}
+        self.scores = [0] * players
+        self.occupied = bytearray(self.board.size * self.board.size)
+        self.packages = {}                            # индекс красной клетки -> номер посылки
+        self.turns = 0
+        self.current_player = 0
+        self.position = 0                             # сколько записей применено
+
+    def records(self, start=0, stop=None):
+        count = (len(self.data) - HEADER.size) // RECORD.size
+        stop = count if stop is None else min(stop, count)
+        view = memoryview(self.data)[HEADER.size + start * RECORD.size:HEADER.size + stop * RECORD.size]
+        return RECORD.iter_unpack(view)
+
+    def run(self, stop=None):
+        """Применить записи с текущей до stop. Возвращает число применённых, при нарушении - ReplayError"""
+        size = self.board.size
+        walkable, white, targets, pickup, occupied = self.walkable, self.white, self.targets, self.pickup, self.occupied
+        robots, cargo, packages, scores = self.robots, self.cargo, self.packages, self.scores
+        players, per_player = self.header['players'], self.header['robots']
+        applied = 0
+        for kind, player, robot, value, x, y in self.records(self.position, stop):
+            # Индексы из файла проверяем до обращения к таблицам: битая запись - ReplayError, а не IndexError
+            if player >= players or robot >= per_player:
+                self.fail(f"no robot {robot} of player {player + 1}", applied)
+            if kind in CELL_KINDS and (x >= size or y >= size):
+                self.fail(f"cell ({x}, {y}) is outside the board", applied)
+            idx = y * size + x
+            if kind == MOVE:
+                old = robots[player].get(robot)
+                if old is None or value >= len(DIRECTION_DELTAS):
+                    self.fail(f"illegal move of robot {robot} of player {player + 1} to ({x}, {y})", applied)
+                dx, dy = DIRECTION_DELTAS[value]
+                if x - old % size != dx or y - old // size != dy or not walkable[idx] or occupied[idx] or \
+                        (targets[idx] and targets[idx] != cargo[player].get(robot)):
+                    self.fail(f"illegal move of robot {robot} of player {player + 1} to ({x}, {y})", applied)
+                occupied[old] = 0
+                occupied[idx] = 1
+                robots[player][robot] = idx
+            elif kind == TURN:
+                self.turns += 1
+                self.current_player = (player + 1) % len(robots)
+            elif kind == PICK:
+                here = robots[player].get(robot)
+                if here is None or not pickup[here] or here + size != idx or packages.pop(idx, None) != value or \
+                        robot in cargo[player]:
+                    self.fail(f"illegal pick of package {value} by robot {robot} of player {player + 1}", applied)
+                cargo[player][robot] = value
+            elif kind == DROP:
+                if robots[player].get(robot) != idx or targets[idx] != cargo[player].pop(robot, None):
+                    self.fail(f"illegal drop by robot {robot} of player {player + 1}", applied)
+                scores[player] += 1
+            elif kind == PACKAGE:
+                packages[idx] = value
+            elif kind == PLACE:
+                # Как Player.place_robot: только свободная белая клетка
+                if occupied[idx] or not white[idx] or robot in robots[player]:
+                    self.fail(f"illegal placement of robot {robot} of player {player + 1} at ({x}, {y})", applied)
+                occupied[idx] = 1
+                robots[player][robot] = idx
+            elif kind == ROBOT:
+                # Робот из описания состояния мог уже уйти с белой клетки
+                if occupied[idx] or not walkable[idx] or robot in robots[player]:
+                    self.fail(f"illegal position of robot {robot} of player {player + 1} at ({x}, {y})", applied)
+                occupied[idx] = 1
+                robots[player][robot] = idx
+            elif kind == CARRY:
+                if robot not in robots[player]:
+                    self.fail(f"cargo of missing robot {robot} of player {player + 1}", applied)
+                cargo[player][robot] = value
+            elif kind == SCORE:
+                scores[player] = x
+            elif kind == RESET:
+                position = self.position + applied
+                self.reset()
+                self.position = position
+                robots, cargo, packages, scores = self.robots, self.cargo, self.packages, self.scores
+                occupied = self.occupied
+            else:
+                self.fail(f"unknown record kind {kind}", applied)
+            applied += 1
+        self.position += applied
+        return applied
+
+    def state_hash(self):
+        """Хэш Зобриста текущего состояния - тот же, что Game.state_hash у партии в этом состоянии"""
+        size = self.board.size
+        value = 0
+        for player, player_robots in enumerate(self.robots):
+            for robot, idx in player_robots.items():
+                value ^= robot_key(player, robot, (idx % size, idx // size))
+            for robot, number in self.cargo[player].items():
+                value ^= carry_key(player, robot, number)
+        for idx, number in self.packages.items():
+            value ^= package_key((idx % size, idx // size), number)
+        placed = sum(map(len, self.robots))
+        return value ^ turn_key(self.current_player, placed < len(self.robots) * self.header['robots'])
+
+    def turn_states(self):
+        """Хэши состояний в конце каждого хода: по ним видно, сколько в партии разных позиций"""
+        turns = [index for index, record in enumerate(self.records(self.position)) if record[0] == TURN]
+        start = self.position
+        for index in turns:
+            self.run(start + index + 1)
+            yield self.state_hash()
+
+    def fail(self, message, applied):
+        raise ReplayError(f"Record {self.position + applied}: {message}")
+
+    def snapshot(self, game):
+        """Состояние воспроизведения как снимок для game.restore: чтобы показать отрезок партии"""
+        from game.Game import GameSnapshot
+        size = self.board.size
+        robots = []
+        for player, player_robots in enumerate(self.robots):
+            entries = []
+            for robot in sorted(player_robots):
+                pos = (player_robots[robot] % size, player_robots[robot] // size)
+                number = self.cargo[player].get(robot)
+                entries.append((pos, None, None) if number is None else (pos, pos, number))
+            robots.append(tuple(entries))
+        packages = tuple(((idx % size, idx // size), number, False, True) for idx, number in self.packages.items())
+        players = tuple((score, game.config.move_limit_per_turn) for score in self.scores)
+        placed = sum(len(player_robots) for player_robots in self.robots)
+        simulator = (self.current_player, 0, tuple(len(player_robots) for player_robots in self.robots), placed,
+                     placed < len(self.robots) * self.header['robots'])
+        return GameSnapshot(tuple(robots), packages, players, simulator, (self.turns, sum(self.scores), None),
+                            game.random.getstate())
+
+
+def apply_record(game, record):
+    """Применить запись к настоящей партии с событиями доски - для показа отрезка через Renderer"""
+    kind, player, robot, value, x, y = record
+    board = game.board
+    simulator = game.simulator
+    if kind == MOVE:
+        robot = game.players[player].robots[robot]
+        old_pos = robot.pos
+        board.update_position(old_pos, (x, y))
+        robot.pos = (x, y)
+        board.notify('robot_moved', robot, old_pos)
+    elif kind == TURN:
+        simulator.current_player = player
+        board.notify('turn_ended', game.players[player])
+        simulator.switch_to_next_player()
+        game.turns += 1
+    elif kind == PICK:
+        robot = game.players[player].robots[robot]
+        package = board.available_packages[(x, y)]
+        robot.package = package
+        package.pick_up()
+        board.hash ^= carry_key(player, robot.index, package.number)
+        board.remove_package((x, y))
+        board.notify('package_picked', robot, package)
+    elif kind == DROP:
+        robot = game.players[player].robots[robot]
+        package = robot.package
+        robot.drop_package(board.cells[y][x], board)
+        game.players[player].score += 1
+        board.notify('package_dropped', robot, package)
+    elif kind == PACKAGE:
+        package = Package((x, y), value)
+        package.visible = not simulator.placing_phase
+        board.restore_package(package)
+        board.notify('package_placed', package)
+    elif kind == PLACE:
+        # Как при игре: счётчики, очередь и конец фазы размещения ведёт симулятор
+        simulator.current_player = player
+        simulator.place_robot_at_position(x, y)
+    elif kind == ROBOT:
+        owner = game.players[player]
+        robot = Robot((x, y), robot, owner)
+        owner.add_robot(robot)
+        board.occupied((x, y), robot)
+        simulator.current_robot_counts[player] += 1
+        simulator.robots_placed += 1
+        board.notify('robot_placed', robot)
+        if simulator.placing_phase and simulator.robots_placed >= simulator.total_robots_to_place:
+            simulator.update_package_visibility(False)
+    elif kind == CARRY:
+        robot = game.players[player].robots[robot]
+        robot.package = Package((x, y), value)
+        robot.package.pick_up()
+        board.hash ^= carry_key(player, robot.index, value)
+        board.notify('package_picked', robot, robot.package)
+    elif kind == SCORE:
+        game.players[player].score = x
+    elif kind == RESET:
+        # Пустое состояние: полное описание придёт следующими записями
+        game.restore(empty_snapshot(game), rng=False)
+    else:
+        raise ReplayError(f"Unknown record kind {kind}")
+
+
+def empty_snapshot(game):
+    """Снимок партии без роботов, посылок и очков - как состояние Replayer сразу после RESET"""
+    from game.Game import GameSnapshot
+    players = len(game.players)
+    move_limit = game.config.move_limit_per_turn
+    return GameSnapshot(((),) * players, (), ((0, move_limit),) * players, (0, 0, (0,) * players, 0, True),
+                        (0, 0, None), game.random.getstate())
+
+
+def show_span(game, data, start, stop, renderer, step_ms=80):
+    """Прокрутить журнал до start без отрисовки и показать записи [start, stop) через renderer"""
+    replayer = Replayer(game.board, data)
+    replayer.run(start)
+    game.restore(replayer.snapshot(game), rng=False)
+    game.simulator.update_package_visibility(game.simulator.placing_phase)
+    for record in replayer.records(start, stop):
+        apply_record(game, record)
+        renderer.draw()
+        if record[0] == MOVE:
+            time.sleep(step_ms / 1000)
+    while renderer.animator.busy:
+        renderer.draw()
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка и показ двоичного журнала партии")
+    parser.add_argument("replay")
+    parser.add_argument("--colors", default="csv_files/colors.csv")
+    parser.add_argument("--targets", default="csv_files/targets.csv")
+    parser.add_argument("--map", default=None, help="двоичная карта *.abm, если партия шла на ней")
+    parser.add_argument("--show", nargs=2, type=int, metavar=("START", "STOP"), help="показать записи [START, STOP)")
+    parser.add_argument("--states", action="store_true", help="сколько разных позиций было в конце ходов")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    with open(args.replay, 'rb') as file:
+        data = file.read()
+    board_class = CompactBoard if args.map else Board
+    colors = args.map or args.colors
+    board = board_class(colors, args.targets)
+    replayer = Replayer(board, data)
+    started = time.perf_counter()
+    count = replayer.run()
+    elapsed = time.perf_counter() - started
+    print(f"Replay OK: seed {replayer.header['seed']}, {count} records, {replayer.turns} turns, "
+          f"scores {replayer.scores} ({count / elapsed if elapsed else 0:.0f} records/s)")
+
+    if args.states:
+        replayer = Replayer(board, data)
+        states = list(replayer.turn_states())
+        print(f"{len(states)} turns, {len(set(states))} distinct states")
+
+    if args.show:
+        import pygame
+        from game.Game import Game
+        from game.Renderer import Renderer
+        from game.config import GameConfig
+        from game.consts import DEFAULT_IMAGE_SIZE
+        config = GameConfig("game.config")
+        config.players_info = [replayer.header['players']] + [1] * replayer.header['players']
+        config.robots_per_player = replayer.header['robots']
+        config.move_limit_per_turn = replayer.header['moves']
+        pygame.init()
+        screen = pygame.display.set_mode((DEFAULT_IMAGE_SIZE[0] * 15, DEFAULT_IMAGE_SIZE[1] * 11))
+        game = Game(config, colors=colors, targets=args.targets, board_class=board_class)
+        renderer = Renderer(screen, game.board, game.players)
+        show_span(game, data, args.show[0], args.show[1], renderer)
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,67 @@
 import logging
-import random
-import pygame
 from game.Package import Package
-from game.consts import DEFAULT_IMAGE_SIZE
+from game.Zobrist import carry_key
+from game.consts import DIRECTIONS, index_to_letter
 
 
 class Robot:
-    image_paths = {
-        0: 'images/blue_robot.png',     # blue
-        1: 'images/red_robot.png',      # red
-        2: 'images/green_robot.png',    # green
-        3: 'images/orange_robot.png'    # orange
-    }
-
-    def __init__(self, pos, index, player, width=DEFAULT_IMAGE_SIZE[0], height=DEFAULT_IMAGE_SIZE[1]):
+    def __init__(self, pos, index, player):
         self.player = player
-        self.number_img = None
         self.pos = pos
         self.package = None
         self.index = index
-        self.set_number_image()
-        self.image = pygame.transform.scale(pygame.image.load(Robot.image_paths[player.id]), (width, height))
-        self.rect = self.image.get_rect(topleft=((pos[0] + 1) * width, (pos[1] + 1) * height))
 
-    def move(self, new_pos):
+    @property
+    def has_package(self):
+        return self.package is not None
+
+    def move(self, direction, board):
+        """Ход робота: сдвиг на одну клетку, затем подбор или сдача посылки"""
+        dx, dy = DIRECTIONS[direction]
+        new_pos = (self.pos[0] + dx, self.pos[1] + dy)
+        if not board.is_valid_move(self, new_pos):
+            board.metrics.count('failed_moves')
+            return False
+
+        old_pos = self.pos
+        board.update_position(old_pos, new_pos)
         self.pos = new_pos
-        self.animate_move()
+        board.notify('robot_moved', self, old_pos)
+        self.interact(board)
+        return True
 
-    def animate_move(self, steps=10):
-        new_x, new_y = self.pos
-        old_rect = self.rect.copy()
-        step_x = ((new_x + 1) * DEFAULT_IMAGE_SIZE[0] - old_rect.x) / steps
-        step_y = ((new_y + 1) * DEFAULT_IMAGE_SIZE[1] - old_rect.y) / steps
-        for i in range(steps):
-            self.rect.x = old_rect.x + step_x * (i + 1)
-            self.rect.y = old_rect.y + step_y * (i + 1)
-            self.player.game_manager.simulator.ScreenAnimator()
-            pygame.display.flip()
-            pygame.time.delay(5)
+    def interact(self, board):
+        """Взаимодействие с клеткой: сдача посылки на своей цели или подбор посылки с красной клетки снизу"""
+        x, y = self.pos
+        cell = board.cells[y][x]
+        if self.package:
+            if cell.target and cell.target == self.package.number:
+                package = self.package
+                self.drop_package(cell, board)
+                self.player.increase_score(1)
+                board.notify('package_dropped', self, package)
+        elif cell.color == 'a' and y + 1 < board.size:
+            below_cell = board.cells[y + 1][x]
+            if below_cell.color == 'r' and below_cell.package and not below_cell.package.picked_up:
+                self.pick_package(below_cell.package, board)
 
-    def pick_package(self, package) -> Package:
+    def pick_package(self, package, board) -> Package:
         self.package = package
         package.pick_up()
+        board.hash ^= carry_key(self.player.id, self.index, package.number)
         logging.info(
-            f"Robot {self.index} of Player {self.player.id + 1} picked up package with number {package.number} at position ({chr(ord('A') + (self.pos[0]))}, {self.pos[1] + 1}).")
-        new_package = Package(package.pos)
-        new_package.number = random.randint(1, 9)
-        return new_package
+            f"Robot {self.index} of Player {self.player.id + 1} picked up package with number {package.number} at position ({index_to_letter(self.pos[0])}, {self.pos[1] + 1}).")
+        board.remove_package(package.pos)
+        board.notify('package_picked', self, package)
+        return board.place_package(package.pos)
 
-    def drop_package(self, cell):
+    def drop_package(self, cell, board):
         if not self.package:
             return False
+        board.hash ^= carry_key(self.player.id, self.index, self.package.number)
         logging.info(
-            f"Robot {self.index} of Player {self.player.idx + 1} dropped package with number {self.package.number} at position ({chr(ord('A') + (self.pos[0]))}, {self.pos[1] + 1}).")
+            f"Robot {self.index} of Player {self.player.idx + 1} dropped package with number {self.package.number} at position ({index_to_letter(self.pos[0])}, {self.pos[1] + 1}).")
         self.package.drop_off()
         self.package = None
         cell.package = None
         return True
-
-    def robot_animator(self, screen):
-        screen.blit(self.image, self.rect)
-        if self.number_img:
-            number_pos = (
-                self.rect.x + self.rect.width // 2 - self.number_img.get_width() // 2,
-                self.rect.y + self.rect.height // 2 - self.number_img.get_height() // 2
-            )
-            screen.blit(self.number_img, number_pos)
-        if self.package:
-            package_image = pygame.image.load('images/package.png')
-            package_image = pygame.transform.scale(package_image,
-                                                   (DEFAULT_IMAGE_SIZE[0] * 1.3, DEFAULT_IMAGE_SIZE[1] * 1.3))
-            package_pos = (
-                self.rect.x + self.rect.width // 2 - package_image.get_width() // 2,
-                self.rect.y - self.rect.height // 2 + DEFAULT_IMAGE_SIZE[0] * 0.38
-            )
-            screen.blit(package_image, package_pos)
-            package_number_font = pygame.font.SysFont(None, 48)
-            number_img = package_number_font.render(str(self.package.number), True, (0, 0, 0))
-            number_pos = (
-                package_pos[0] + package_image.get_width() // 2 - number_img.get_width() // 2,
-                package_pos[1] + package_image.get_height() // 2 - number_img.get_height() * 1.4  # Смещение выше
-            )
-            screen.blit(number_img, number_pos)
-
-    def set_number_image(self):
-        robot_number_font = pygame.font.SysFont(None, 32)
-        self.number_img = robot_number_font.render(str(self.index), True, (0, 0, 0))
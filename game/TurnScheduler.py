@@ -0,0 +1,81 @@
+import logging
+from collections import deque
+
+PLACING = 'placing'
+MOVING = 'moving'
+SCORING = 'scoring'
+
+
+class TurnScheduler:
+    """Очередь действий партии по фазам: расстановка роботов, ходы, подсчёт очков.
+    Действия автоботов выполняются по step(), ход человека идёт через ввод, а sync() догоняет симулятор"""
+
+    def __init__(self, game, worker=None):
+        self.game = game
+        self.worker = worker  # PlanWorker: ходы автоботов считаются в фоне, step() только применяет готовый план
+        self.queue = deque()
+        self.fill()
+
+    def fill(self):
+        """Действия текущего игрока: при расстановке - поставить робота, иначе - ход и подсчёт очков"""
+        player = self.game.current_player
+        if self.game.simulator.placing_phase:
+            self.queue.append((PLACING, player))
+        else:
+            self.queue.append((MOVING, player))
+            self.queue.append((SCORING, player))
+
+    @property
+    def phase(self):
+        return self.queue[0][0]
+
+    @property
+    def player(self):
+        return self.queue[0][1]
+
+    def is_automatic(self):
+        """Действие в голове очереди выполняет автобот (ход человека ждёт ввода)"""
+        return self.phase == SCORING or self.game.get_auto_play(self.player) is not None
+
+    def ready(self):
+        """Можно ли выполнить действие из головы очереди без ожидания: план хода автобота уже посчитан в фоне"""
+        if self.worker is None or self.phase != MOVING or not self.is_automatic():
+            return True
+        return self.worker.ready()
+
+    def step(self):
+        """Выполнить действие из головы очереди. False - действие выполнить нельзя"""
+        phase, player = self.queue[0]
+        if phase == PLACING:
+            if not self.game.place_robot_automatically():
+                return False
+        elif phase == MOVING:
+            moves = self.worker.take() if self.worker else None
+            if moves is None:
+                self.game.get_auto_play(player).play()
+            else:
+                self.game.get_auto_play(player).play_moves(moves)
+            if self.worker:
+                self.worker.prefetch()  # Следующие автоботы думают, пока этот ход анимируется
+        else:
+            self.game.end_turn()
+        self.queue.popleft()
+        if not self.queue:
+            self.fill()
+        return True
+
+    def sync(self):
+        """После ввода человека симулятор сам передаёт ход - очередь перестраивается под него.
+        Возвращает True, если действие в голове очереди сменилось"""
+        phase, player = self.queue[0]
+        if player is self.game.current_player and (phase == PLACING) == self.game.simulator.placing_phase:
+            return False
+        if phase != PLACING:
+            # Ход человека закончился клавишей или исчерпанием ходов: очки и счётчик ходов как у автобота
+            self.game.check_winner()
+            self.game.board.notify('turn_ended', player)
+            self.game.turns += 1
+        logging.debug(f"Scheduler: {phase} of player {player.id + 1} finished by input.")
+        self.queue.clear()
+        self.fill()
+        return True
@@ -0,0 +1,213 @@
+import argparse
+import time
+from collections import namedtuple
+import numpy as np
+from game.Board import Board
+from game.CompactBoard import CompactBoard
+from game.config import GameConfig
+from game.consts import DIRECTIONS, WALKABLE_COLORS
+
+PASS = -1  # Действие "пропустить шаг": ход тратится, роботы стоят
+DX = np.array([dx for dx, dy in DIRECTIONS.values()], dtype=np.int32)
+DY = np.array([dy for dx, dy in DIRECTIONS.values()], dtype=np.int32)
+
+# Итог шага по всем партиям, массивы длины N: кто ходил, допустим ли был шаг, сдана ли посылка,
+# закончилась ли партия (после этого она уже начата заново, если reset_done)
+VectorStep = namedtuple('VectorStep', 'player legal delivered done')
+
+
+class VectorEnv:
+    """N партий на одной карте, шаг - сразу во всех (lockstep) на массивах NumPy, без объектов Board/Robot/Package.
+    Правила как у Board.is_valid_move и Robot.interact: ходить по клеткам 'w', 'a', 'g', 'y', не на занятые
+    и не на чужие цели; на зелёной клетке над красной робот без груза берёт посылку, на своей цели - сдаёт.
+    Действие партии - номер робота текущего игрока * 4 + номер направления из DIRECTIONS или PASS.
+    Каждый шаг тратит один ход из move_limit_per_turn, недопустимый тоже (иначе роллаут может не двигаться),
+    после последнего хода ход переходит к следующему игроку.
+    Состояние - открытые массивы: positions (N, игроки * роботы) - номер клетки y * size + x,
+    cargo - номер посылки у робота (0 - пусто), packages (N, красные клетки) - номера посылок, scores (N, игроки)"""
+
+    def __init__(self, config, board, num_games, seed=None, reset_done=True):
+        self.num_games = num_games
+        self.num_players = config.get_num_players()
+        self.robots_per_player = config.robots_per_player
+        self.move_limit = config.move_limit_per_turn
+        self.win_score = config.win_score
+        self.reset_done = reset_done  # Законченные партии сразу начинаются заново: роллауты идут без пауз
+        self.random = np.random.default_rng(seed)
+
+        # Карта: статичные массивы по клеткам
+        self.size = size = board.size
+        colors = [board.cells[y][x].color for y in range(size) for x in range(size)]
+        self.walkable = np.array([color in WALKABLE_COLORS for color in colors])
+        self.targets = np.array([board.cells[y][x].target for y in range(size) for x in range(size)], dtype=np.uint8)
+        self.white = np.flatnonzero(np.array(colors) == 'w').astype(np.int32)
+        self.red = np.flatnonzero(np.array(colors) == 'r').astype(np.int32)
+        # Клетка -> красная клетка под ней, с которой робот берёт посылку (-1 - не берёт)
+        self.pickup = np.full(size * size, -1, dtype=np.int32)
+        for slot, cell in enumerate(self.red):
+            above = cell - size
+            if above >= 0 and colors[above] == 'a':
+                self.pickup[above] = slot
+        self.package_range = int(self.targets.max()) or 9
+
+        robots = self.num_players * self.robots_per_player
+        if robots > len(self.white):
+            raise ValueError(f"{robots} robots do not fit on {len(self.white)} white cells")
+        self.games = np.arange(num_games)
+        self.offsets = self.games * (size * size)  # Начало строки партии в плоском occupied
+        self.positions = np.zeros((num_games, robots), dtype=np.int32)
+        self.cargo = np.zeros((num_games, robots), dtype=np.uint8)
+        self.packages = np.zeros((num_games, len(self.red)), dtype=np.uint8)
+        self.scores = np.zeros((num_games, self.num_players), dtype=np.int32)
+        self.current = np.zeros(num_games, dtype=np.int32)
+        self.moves_left = np.zeros(num_games, dtype=np.int32)
+        self.turns = np.zeros(num_games, dtype=np.int32)
+        self.occupied = np.zeros(num_games * size * size, dtype=bool)
+        self.reset()
+
+    def reset(self, games=None):
+        """Новые партии: роботы на разных случайных белых клетках, посылки на всех красных"""
+        games = self.games if games is None else np.asarray(games)
+        count = len(games)
+        robots = self.positions.shape[1]
+        keys = self.random.random((count, len(self.white)))
+        if robots < len(self.white):
+            keys = np.argpartition(keys, robots - 1, axis=1)
+        else:
+            keys = np.argsort(keys, axis=1)
+        cells = self.white[keys[:, :robots]]
+        self.occupied.reshape(self.num_games, -1)[games] = False
+        self.occupied.reshape(self.num_games, -1)[games[:, None], cells] = True
+        self.positions[games] = cells
+        self.cargo[games] = 0
+        self.packages[games] = self.random.integers(1, self.package_range + 1, (count, len(self.red)), dtype=np.uint8)
+        self.scores[games] = 0
+        self.current[games] = 0
+        self.moves_left[games] = self.move_limit
+        self.turns[games] = 0
+
+    def load_game(self, index, game):
+        """Партия index - копия позиции game (на той же карте, роботы расставлены): например, роллауты от живой партии"""
+        size = self.size
+        robots = [robot for player in game.players for robot in player.robots]
+        if len(robots) != self.positions.shape[1]:
+            raise ValueError("All robots must be placed before loading the game")
+        row = self.occupied.reshape(self.num_games, -1)[index]
+        row[:] = False
+        for slot, robot in enumerate(robots):
+            cell = robot.pos[1] * size + robot.pos[0]
+            self.positions[index, slot] = cell
+            self.cargo[index, slot] = robot.package.number if robot.package else 0
+            row[cell] = True
+        for slot, cell in enumerate(self.red):
+            package = game.board.available_packages.get((int(cell % size), int(cell // size)))
+            self.packages[index, slot] = package.number if package else 0
+        self.scores[index] = [player.score for player in game.players]
+        self.current[index] = game.simulator.current_player
+        self.moves_left[index] = game.current_player.remaining_moves
+        self.turns[index] = game.turns
+
+    def legal_actions(self):
+        """Маска допустимых шагов (N, роботы игрока * 4) для текущих игроков"""
+        robots = self.robots_per_player
+        slots = self.current[:, None] * robots + np.arange(robots)
+        positions = np.take_along_axis(self.positions, slots, axis=1)[:, :, None]
+        cargo = np.take_along_axis(self.cargo, slots, axis=1)[:, :, None]
+        x = positions % self.size + DX
+        y = positions // self.size + DY
+        inside = (x >= 0) & (x < self.size) & (y >= 0) & (y < self.size)
+        cells = np.where(inside, y * self.size + x, positions)
+        targets = self.targets[cells]
+        legal = inside & self.walkable[cells] & ~self.occupied[self.offsets[:, None, None] + cells] & \
+            ((targets == 0) | (targets == cargo))
+        return legal.reshape(self.num_games, robots * len(DIRECTIONS))
+
+    def step(self, actions):
+        """Один шаг во всех партиях: actions - массив длины N. Действие с номером робота вне
+        robots_per_player недопустимо и тратит ход, как шаг в стену"""
+        actions = np.asarray(actions)
+        size = self.size
+        player = self.current.copy()
+        robot = actions >> 2
+        # Номер робота вне диапазона - недопустимый шаг, как PASS; слот для индексации берём нулевой
+        acting = (actions >= 0) & (robot < self.robots_per_player)
+        slots = player * self.robots_per_player + np.where(acting, robot, 0)
+        direction = actions & 3
+        positions = self.positions[self.games, slots]
+        cargo = self.cargo[self.games, slots]
+
+        # Проверка шага, как в Board.is_valid_move
+        x = positions % size + DX[direction]
+        y = positions // size + DY[direction]
+        inside = acting & (x >= 0) & (x < size) & (y >= 0) & (y < size)
+        cells = np.where(inside, y * size + x, positions)
+        targets = self.targets[cells]
+        legal = inside & self.walkable[cells] & ~self.occupied[self.offsets + cells] & \
+            ((targets == 0) | (targets == cargo))
+
+        moved = np.flatnonzero(legal)
+        moved_slots = slots[moved]
+        moved_cells = cells[moved]
+        self.occupied[self.offsets[moved] + positions[moved]] = False
+        self.occupied[self.offsets[moved] + moved_cells] = True
+        self.positions[moved, moved_slots] = moved_cells
+
+        # Взаимодействие с клеткой, как в Robot.interact: сдача на своей цели или подбор с красной клетки снизу
+        delivered = legal & (cargo > 0) & (targets == cargo)
+        games = np.flatnonzero(delivered)
+        self.cargo[games, slots[games]] = 0
+        self.scores[games, player[games]] += 1
+        pickup = self.pickup[cells]
+        games = np.flatnonzero(legal & (cargo == 0) & (pickup >= 0))
+        picked = pickup[games]
+        self.cargo[games, slots[games]] = self.packages[games, picked]
+        self.packages[games, picked] = self.random.integers(1, self.package_range + 1, len(games), dtype=np.uint8)
+
+        # Ходы игрока кончились: победа проверяется в конце хода, как в Game.end_turn
+        self.moves_left -= 1
+        ended = self.moves_left == 0
+        done = ended & (self.scores.max(axis=1) >= self.win_score)
+        self.moves_left[ended] = self.move_limit
+        self.current[ended] = (self.current[ended] + 1) % self.num_players
+        self.turns += ended
+        if self.reset_done and done.any():
+            self.reset(np.flatnonzero(done))
+        return VectorStep(player, legal, delivered, done)
+
+    def random_actions(self, legal=None):
+        """Случайный допустимый шаг в каждой партии (PASS, если шагов нет): для роллаутов и замеров"""
+        legal = self.legal_actions() if legal is None else legal
+        keys = np.where(legal, self.random.random(legal.shape), -1.0)
+        actions = keys.argmax(axis=1)
+        return np.where(keys[self.games, actions] >= 0, actions, PASS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер пакетного окружения: N партий случайными допустимыми шагами")
+    parser.add_argument("--config", default="game.config")
+    parser.add_argument("--map", default=None, help="двоичная карта *.abm вместо csv_files")
+    parser.add_argument("--games", type=int, default=65536)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixed-actions", action="store_true",
+                        help="одни и те же действия на каждом шаге: меряем только step, без выбора хода")
+    args = parser.parse_args()
+    config = GameConfig(args.config)
+    board = CompactBoard(args.map, None) if args.map else Board("csv_files/colors.csv", "csv_files/targets.csv")
+    env = VectorEnv(config, board, args.games, seed=args.seed)
+    actions = env.random_actions()
+    deliveries = games_done = 0
+    started = time.perf_counter()
+    for _ in range(args.steps):
+        if not args.fixed_actions:
+            actions = env.random_actions()
+        result = env.step(actions)
+        deliveries += int(result.delivered.sum())
+        games_done += int(result.done.sum())
+    elapsed = time.perf_counter() - started
+    print(f"{args.games * args.steps} env-steps in {elapsed:.2f}s ({args.games * args.steps / elapsed:,.0f} steps/s)")
+    print(f"Deliveries: {deliveries}, games finished: {games_done}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+# Хэш Зобриста: состояние - XOR случайных 64-битных ключей его частей. Ход робота, подбор или сдача посылки
+# меняют хэш двумя XOR, без пересчёта всего состояния. Ключи детерминированы (splitmix64 от частей),
+# поэтому хэш одного и того же состояния совпадает между партиями и процессами, например в журналах
+MASK = (1 << 64) - 1
+ROBOT, CARRY, PACKAGE, TURN = range(1, 5)
+
+keys = {}
+MISSING = object()
+
+
+def splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+def zobrist_key(*parts):
+    key = keys.get(parts)
+    if key is None:
+        key = 0
+        for part in parts:
+            key = splitmix64(key ^ part)
+        keys[parts] = key
+    return key
+
+
+def robot_key(player, index, pos):
+    """Робот index игрока player стоит на pos"""
+    return zobrist_key(ROBOT, player, index, pos[0], pos[1])
+
+
+def carry_key(player, index, number):
+    """Робот несёт посылку с номером number"""
+    return zobrist_key(CARRY, player, index, number)
+
+
+def package_key(pos, number):
+    """Посылка с номером number лежит на pos"""
+    return zobrist_key(PACKAGE, pos[0], pos[1], number)
+
+
+def turn_key(player, placing):
+    """Чей ход и идёт ли ещё расстановка"""
+    return zobrist_key(TURN, player, placing)
+
+
+class TranspositionTable:
+    """Ограниченный кэш по хэшу состояния с вытеснением давно не использованных записей (LRU)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
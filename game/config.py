@@ -11,6 +11,7 @@ class GameConfig:
         self.robots_per_player = None
         self.charging_accounting = None
         self.move_limit_per_turn = None
+        self.turbo = 0
         self._parse_config()
 
     def _parse_config(self):
@@ -24,6 +25,8 @@ class GameConfig:
             self.win_score = int(lines[5].split('#')[0].strip())                        # parse win score
             self.robots_per_player = int(lines[6].split('#')[0].strip())                # parse robots per player
             self.charging_accounting = int(lines[7].split('#')[0].strip())              # parse charging accounting
+            if len(lines) > 8:
+                self.turbo = int(lines[8].split('#')[0].strip())                        # parse turbo mode
 
     def get_num_players(self):
         return self.players_info[0]
@@ -1 +1,26 @@
-DEFAULT_IMAGE_SIZE = (60, 60)
\ No newline at end of file
+DEFAULT_IMAGE_SIZE = (60, 60)
+
+DIRECTIONS = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0)
+}
+DIRECTION_BY_DELTA = {delta: direction for direction, delta in DIRECTIONS.items()}
+
+WALKABLE_COLORS = ('w', 'a', 'g', 'y')
+
+
+def column_name(index):
+    """0 -> 'a', 25 -> 'z', 26 -> 'aa'"""
+    name = ''
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(ord('a') + rest) + name
+    return name
+
+
+def index_to_letter(index):
+    """Столбец для логов: 0 -> 'A', 26 -> 'AA'"""
+    return column_name(index).upper()
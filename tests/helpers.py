@@ -0,0 +1,25 @@
+import logging
+import os
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class InRepoRoot:
+    """Тест запускается из корня репозитория (карта и конфиг лежат относительно него), логи игры до WARNING молчат.
+    Подмешивается перед классом TestCase; свой setUp наследника вызывает super().setUp()"""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(ROOT)
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+
+class RepoTestCase(InRepoRoot, unittest.TestCase):
+    pass
+
+
+class AsyncRepoTestCase(InRepoRoot, unittest.IsolatedAsyncioTestCase):
+    pass
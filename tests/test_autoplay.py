@@ -0,0 +1,76 @@
+import unittest
+from game.Game import Game
+from game.Metrics import METRICS, Metrics
+from game.PlanWorker import PlanWorker
+from game.config import GameConfig
+from helpers import RepoTestCase
+
+MAX_TURNS = 1000
+
+
+class GreedyAutoPlayTest(RepoTestCase):
+    """Пошаговый режим автобота (cooperative=False): груженые роботы идут по полям потока доски"""
+
+    def make_game(self, seed):
+        config = GameConfig("game.config")
+        game = Game(config, player_types=[1] * config.get_num_players(), seed=seed)
+        for auto_play in game.auto_play:
+            auto_play.cooperative = False
+        return game
+
+    def test_greedy_games_finish(self):
+        for seed in range(3):
+            game = self.make_game(seed)
+            winner = game.run(MAX_TURNS)
+            self.assertIsNotNone(winner)
+            self.assertGreaterEqual(winner.score, game.config.win_score)
+            self.assertTrue(game.board.flow_fields)  # Посылки сдавались по полям потока
+
+    def test_flow_field_matches_static_distance_without_robots(self):
+        board = self.make_game(0).board
+        self.assertFalse(board.occupied_cells)
+        for number, pos in board.target_cells.items():
+            flow = board.flow_field(number)
+            flow.sync()
+            for idx, dist in enumerate(board.distance_field(pos)):
+                if dist >= 0:
+                    self.assertEqual(flow.field[idx], dist)
+
+
+class ShadowMetricsTest(RepoTestCase):
+    """Копии партии для поиска с просмотром вперёд и фонового планирования считают метрики отдельно от общих METRICS"""
+
+    def test_lookahead_does_not_count_into_global_metrics(self):
+        config = GameConfig("game.config")
+        metrics = Metrics()
+        game = Game(config, player_types=[1] * config.get_num_players(), seed=0, lookahead_nodes=200,
+                    metrics=metrics)
+        before = METRICS.totals()
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        for _ in range(4):
+            game.play_turn()
+
+        self.assertEqual(METRICS.totals(), before)
+        self.assertGreater(metrics.summaries['play_seconds'][0], 0)
+        shadow = game.auto_play[0].search.shadow
+        self.assertIsNot(shadow.board.metrics, METRICS)
+        self.assertGreater(shadow.board.metrics.counters['planner_nodes'], 0)
+
+    def test_plan_worker_does_not_count_into_global_metrics(self):
+        config = GameConfig("game.config")
+        game = Game(config, player_types=[1] * config.get_num_players(), seed=0)
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        worker = PlanWorker(game)
+        self.addCleanup(worker.close)
+        before = METRICS.totals()
+        plans = worker.plan(game.snapshot(), end_turn=False)
+
+        self.assertIn(game.snapshot(), plans)
+        self.assertEqual(METRICS.totals(), before)
+        self.assertGreater(worker.shadow.board.metrics.counters['planner_nodes'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
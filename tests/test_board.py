@@ -0,0 +1,36 @@
+import os
+import unittest
+from game.Board import Board
+from game.CompactBoard import CompactBoard
+from helpers import ROOT
+
+COLORS = os.path.join(ROOT, "csv_files/colors.csv")
+TARGETS = os.path.join(ROOT, "csv_files/targets.csv")
+
+
+class MapTablesTest(unittest.TestCase):
+    """Статичные таблицы карты: поля расстояний строятся по запросу и общие для досок с той же картой"""
+
+    def test_fields_are_built_lazily_and_shared(self):
+        board = Board(COLORS, TARGETS)
+        board.distance_fields.clear()
+        other = Board(COLORS, TARGETS)
+        self.assertIs(other.tables, board.tables)
+        self.assertFalse(other.distance_fields)
+
+        pos = next(iter(board.target_cells.values()))
+        field = board.distance_field(pos)
+        self.assertIs(other.distance_field(pos), field)
+
+    def test_compact_board_matches_board(self):
+        board = Board(COLORS, TARGETS)
+        compact = CompactBoard(COLORS, TARGETS)
+        self.assertIsNot(compact.tables, board.tables)
+        for pos in board.target_cells.values():
+            self.assertEqual(list(compact.distance_field(pos)), list(board.distance_field(pos)))
+        for idx in range(board.size * board.size):
+            self.assertEqual(compact.neighbour_indexes[idx], board.neighbour_indexes[idx])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import copy
+import unittest
+from game.BotClient import BotClient
+from game.CommandServer import CommandServer
+from game.Commands import format_position
+from game.config import GameConfig
+from helpers import AsyncRepoTestCase
+
+TIMEOUT = 10  # Секунд на ответ сервера
+
+
+class CommandServerTest(AsyncRepoTestCase):
+    """Сервер команд на свободном порту, клиенты - сырые соединения и бот-заглушка BotClient"""
+
+    async def asyncSetUp(self):
+        self.config = copy.copy(GameConfig("game.config"))
+        self.config.players_info = [2, 0, 0]
+        self.listeners = []
+        self.events = {}  # Поток клиента -> события, пришедшие вперемешку с ответами
+
+    async def asyncTearDown(self):
+        for listener in self.listeners:
+            listener.close()
+            await listener.wait_closed()
+
+    async def start(self, win_score=None):
+        if win_score is not None:
+            self.config.win_score = win_score
+        self.server = CommandServer(self.config)
+        self.server.advance()
+        listener = await asyncio.start_server(self.server.handle_client, "127.0.0.1", 0)
+        self.listeners.append(listener)
+        self.port = listener.sockets[0].getsockname()[1]
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        self.addAsyncCleanup(self.close, writer)
+        self.assertTrue((await self.read(reader)).startswith("EVENT TURN 1 PLACING"))
+        return reader, writer
+
+    async def close(self, writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def read(self, reader):
+        return (await asyncio.wait_for(reader.readline(), TIMEOUT)).decode().strip()
+
+    async def request(self, client, line):
+        """Команда и ответ на неё (OK / ERR); события до ответа пропускаются"""
+        reader, writer = client
+        writer.write(line.encode() + b"\n")
+        while True:
+            reply = await self.read(reader)
+            if not reply.startswith("EVENT"):
+                return reply
+            self.events.setdefault(reader, []).append(reply)
+
+    async def expect_event(self, reader, prefix):
+        """Событие с началом prefix: из уже пришедших или следующих строк"""
+        events = self.events.setdefault(reader, [])
+        while True:
+            while events:
+                line = events.pop(0)
+                if line.startswith(prefix):
+                    return line
+            events.append(await self.read(reader))
+
+    async def wait_games(self, games, tasks):
+        """Ждём, пока сервер начнёт games-ю партию; бот, закончивший игру раньше, - ошибка"""
+        while self.server.games < games:
+            for task in tasks:
+                if task.done():
+                    task.result()
+                    self.fail("bot stopped before the rollover")
+            await asyncio.sleep(0.01)
+
+    def free_white_cells(self):
+        board = self.server.game.board
+        return [(cell.x, cell.y) for cell in board.white_cells if not board.is_occupied((cell.x, cell.y))]
+
+    async def test_replies_and_turn_order(self):
+        await self.start()
+        first = await self.connect()
+        second = await self.connect()
+
+        self.assertEqual(await self.request(second, "PUT BOT a1"), "ERR send GAMER n first")
+        self.assertEqual(await self.request(first, "GAMER 1"), "OK player 1")
+        self.assertEqual(await self.request(second, "GAMER 1"), "ERR player 1 is taken")
+        self.assertEqual(await self.request(second, "GAMER 2"), "OK player 2")
+        self.assertEqual(await self.request(first, "GAMER 2"), "ERR already playing as 1")
+        self.assertTrue((await self.request(first, "JUMP a1")).startswith("ERR invalid command"))
+
+        # Не в свою очередь - отказ, состояние не меняется
+        cell = format_position(self.free_white_cells()[0])
+        self.assertEqual(await self.request(second, f"PUT BOT {cell}"), "ERR not your turn, player 1 moves")
+        self.assertEqual(self.server.simulator.robots_placed, 0)
+
+        board = self.server.game.board
+        blocked = next((cell.x, cell.y) for row in board.cells for cell in row if cell.color != 'w')
+        self.assertTrue((await self.request(first, f"PUT BOT {format_position(blocked)}")).startswith("ERR cannot place"))
+
+        self.assertEqual(await self.request(first, f"PUT BOT {cell}"), "OK")
+        await self.expect_event(first[0], f"EVENT PLACED 1 1 {cell}")
+        await self.expect_event(second[0], f"EVENT PLACED 1 1 {cell}")
+        await self.expect_event(second[0], "EVENT TURN 2 PLACING")
+        self.assertEqual(await self.request(first, "END"), "ERR not your turn, player 2 moves")
+
+    async def test_bots_roll_over_to_next_game(self):
+        # Победа с нулём очков: партия заканчивается после первого хода, и сервер начинает новую.
+        # Четвёртая партия начинается только после ходов ботов в третьей - значит, обе смены партии они уже видели
+        await self.start(win_score=0)
+        bots = [BotClient(player, seed=player) for player in (1, 2)]
+        connections = [await asyncio.open_connection("127.0.0.1", self.port) for _ in bots]
+        tasks = [asyncio.create_task(bot.play(reader, writer)) for bot, (reader, writer) in zip(bots, connections)]
+        try:
+            await asyncio.wait_for(self.wait_games(4, tasks), TIMEOUT * 3)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for _, writer in connections:
+                await self.close(writer)
+
+        self.assertGreater(self.server.games, 2)
+        self.assertTrue(all(bot.games >= 2 for bot in bots))
+        board = self.server.game.board
+        self.assertEqual(board.hash, board.rehash())  # Новые партии не сбивают инкрементальный хэш
+
+
+if __name__ == "__main__":
+    unittest.main()
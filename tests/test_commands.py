@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from game.Commands import CommandStream, EndCommand, PutBotCommand
+
+
+class CommandStreamTest(unittest.TestCase):
+    """Потоковое чтение файла команд: разбираются только строки, законченные переводом строки"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".txt")
+        os.close(handle)
+        self.stream = CommandStream(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def append(self, data):
+        with open(self.path, "ab") as file:
+            file.write(data)
+
+    def test_unterminated_line_waits_for_newline(self):
+        self.append(b"PUT BOT a1\nEN")
+        self.assertEqual([type(command) for command in self.stream.poll()], [PutBotCommand])
+        # Файл не меняется: недописанная строка не разбирается, сколько ни опрашивай
+        self.assertEqual(self.stream.poll(), [])
+        self.assertEqual(self.stream.poll(), [])
+        self.append(b"D\n")
+        self.assertEqual([type(command) for command in self.stream.poll()], [EndCommand])
+
+    def test_close_flushes_last_line(self):
+        self.append(b"END")
+        self.assertEqual(self.stream.poll(), [])
+        self.assertEqual([type(command) for command in self.stream.close()], [EndCommand])
+        self.assertEqual(self.stream.close(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from game.Game import Game
+from game.Replay import MOVE, PLACE, RECORD, HEADER, ReplayError, ReplayRecorder, Replayer, apply_record, empty_snapshot
+from game.config import GameConfig
+from helpers import RepoTestCase
+
+
+class ReplayerTest(RepoTestCase):
+    """Проверка журнала партии: честная партия проходит, подделанная запись - ошибка"""
+
+    def setUp(self):
+        super().setUp()
+        config = GameConfig("game.config")
+        self.game = Game(config, player_types=[1] * config.get_num_players(), seed=0)
+        self.recorder = ReplayRecorder(self.game)
+
+    def records(self, data):
+        return list(RECORD.iter_unpack(memoryview(data)[HEADER.size:]))
+
+    def test_recorded_game_verifies(self):
+        self.game.run()
+        replayer = Replayer(self.game.board, self.recorder.data)
+        replayer.run()
+        self.assertEqual(replayer.state_hash(), self.game.state_hash)
+
+    def test_restored_state_verifies(self):
+        # После восстановления роботы описываются там, где стоят, а не на белых клетках расстановки
+        game = self.game
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        board = game.board
+        robots = [robot for player in game.players for robot in player.robots]
+        while all(board.cells[robot.pos[1]][robot.pos[0]].color == 'w' for robot in robots):
+            game.play_turn()
+        game.restore(game.snapshot())
+        game.play_turn()
+        replayer = Replayer(game.board, self.recorder.data)
+        replayer.run()
+        self.assertEqual(replayer.state_hash(), game.state_hash)
+
+    def test_records_apply_to_game(self):
+        # Показ отрезка: все записи, включая расстановку и описание состояния после RESET, дают ту же позицию
+        game = self.game
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        for _ in range(3):
+            game.play_turn()
+        game.restore(game.snapshot())
+        for _ in range(3):
+            game.play_turn()
+        shown = Game(game.config, player_types=[1] * len(game.players), seed=1)
+        shown.restore(empty_snapshot(shown), rng=False)
+        for record in self.records(self.recorder.data):
+            apply_record(shown, record)
+        self.assertEqual(shown.state_hash, game.state_hash)
+        self.assertEqual(shown.board.hash, shown.board.rehash())
+        self.assertEqual([player.score for player in shown.players], [player.score for player in game.players])
+        replayer = Replayer(game.board, self.recorder.data)
+        replayer.run()
+        self.assertEqual(shown.turns, replayer.turns)  # Журнал считает ходы от последнего RESET
+
+    def test_placement_off_white_cell_fails(self):
+        game = self.game
+        while game.simulator.placing_phase:
+            game.place_robot_automatically()
+        board = game.board
+        cell = next(cell for cell in board.green_cells if not board.is_occupied((cell.x, cell.y)))
+        data = bytearray(self.recorder.data)
+        index = next(i for i, record in enumerate(self.records(data)) if record[0] == PLACE)
+        kind, player, robot, value, _, _ = self.records(data)[index]
+        RECORD.pack_into(data, HEADER.size + index * RECORD.size, kind, player, robot, value, cell.x, cell.y)
+        with self.assertRaises(ReplayError):
+            Replayer(board, bytes(data)).run()
+
+    def test_record_out_of_range_fails(self):
+        # Несуществующий игрок, робот или клетка - ошибка журнала, а не IndexError / KeyError
+        self.game.run()
+        data = self.recorder.data
+        index = next(i for i, record in enumerate(self.records(data)) if record[0] == MOVE)
+        kind, player, robot, value, x, y = self.records(data)[index]
+        size = self.game.board.size
+        for bad in ((kind, 200, robot, value, x, y), (kind, player, 200, value, x, y),
+                    (kind, player, robot, value, size, y), (kind, player, robot, 200, x, y)):
+            corrupted = bytearray(data)
+            RECORD.pack_into(corrupted, HEADER.size + index * RECORD.size, *bad)
+            with self.assertRaises(ReplayError):
+                Replayer(self.game.board, bytes(corrupted)).run()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import unittest
+import numpy as np
+from game.Board import Board
+from game.VectorEnv import PASS, VectorEnv
+from game.config import GameConfig
+from helpers import ROOT
+
+
+class VectorEnvTest(unittest.TestCase):
+    """Пакетное окружение: недопустимые действия не двигают роботов и не выходят за массивы"""
+
+    def setUp(self):
+        config = GameConfig(os.path.join(ROOT, "game.config"))
+        board = Board(os.path.join(ROOT, "csv_files/colors.csv"), os.path.join(ROOT, "csv_files/targets.csv"))
+        self.env = VectorEnv(config, board, 4, seed=0)
+
+    def test_robot_index_out_of_range_is_illegal(self):
+        env = self.env
+        positions = env.positions.copy()
+        moves_left = env.moves_left.copy()
+        robots = env.robots_per_player
+        # Номер робота за пределами игрока и за пределами всех роботов партии
+        actions = np.array([robots * 4, robots * 4 + 3, env.positions.shape[1] * 4 + 1, PASS])
+        result = env.step(actions)
+        self.assertFalse(result.legal.any())
+        np.testing.assert_array_equal(env.positions, positions)
+        np.testing.assert_array_equal(env.moves_left, moves_left - 1)
+
+    def test_random_actions_are_legal(self):
+        env = self.env
+        for _ in range(50):
+            legal = env.legal_actions()
+            actions = env.random_actions(legal)
+            result = env.step(actions)
+            expected = (actions >= 0) & legal[env.games, np.maximum(actions, 0)]
+            np.testing.assert_array_equal(result.legal, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()